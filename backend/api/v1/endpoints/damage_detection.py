@@ -1,51 +1,31 @@
 from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
 from sqlmodel import Session, select
-from datetime import datetime
-import os
-from pathlib import Path
 from typing import List
-import tensorflow as tf
-import numpy as np
-from PIL import Image
 
 from app.models import DamageAnalysis
 from db.database import get_session
+from app.services.executor import run_cpu, run_io
+from app.services.ml import get_runtime, preprocessor
+from app.services.pricing import get_rate_table
+from app.services.uploads import save_upload, upload_path
 
 router = APIRouter(prefix="/api", tags=["damage-detection"])
 
-# Load the model
-model = tf.keras.models.load_model("model/damage_detection.h5")
 
 def analyze_damage(image_path: str) -> dict:
     """Analyze car damage from an image."""
     try:
         # Load and preprocess the image
-        img = Image.open(image_path)
-        img = img.resize((224, 224))
-        img_array = np.array(img) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
+        img_array = preprocessor.preprocess([image_path])
 
         # Get prediction
-        prediction = model.predict(img_array)
+        prediction = get_runtime().predict(img_array)
         confidence = float(prediction[0][0])
         damage_detected = confidence > 0.5
 
         # Generate analysis results
         severity = "High" if confidence > 0.8 else "Medium" if confidence > 0.5 else "Low"
 
-        # Mock cost estimation based on severity
-        cost_estimation = {
-            "totalCost": 1500 if severity == "High" else 800 if severity == "Medium" else 300,
-            "laborCost": 500 if severity == "High" else 300 if severity == "Medium" else 100,
-            "partsCost": 700 if severity == "High" else 400 if severity == "Medium" else 150,
-            "paintCost": 300 if severity == "High" else 100 if severity == "Medium" else 50,
-            "breakdown": [
-                {"item": "Labor", "cost": 500, "description": "Repair work"},
-                {"item": "Parts", "cost": 700, "description": "Replacement parts"},
-                {"item": "Paint", "cost": 300, "description": "Repainting"}
-            ] if severity == "High" else []
-        }
-
         # Mock damage types based on severity
         damage_types = [
             {
@@ -61,7 +41,7 @@ def analyze_damage(image_path: str) -> dict:
             "confidence": confidence,
             "severity": severity,
             "damage_types": damage_types,
-            "cost_estimation": cost_estimation
+            "cost_estimation": get_rate_table().estimate(damage_types)
         }
 
     except Exception as e:
@@ -74,20 +54,12 @@ async def analyze_image(
     file: UploadFile = File(...),
     user_id: int
 ):
-    # Create uploads directory if it doesn't exist
-    uploads_dir = Path("uploads") / str(user_id)
-    uploads_dir.mkdir(parents=True, exist_ok=True)
-
-    # Save the uploaded image
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    image_path = uploads_dir / f"{timestamp}_{file.filename}"
-    
-    with open(image_path, "wb") as image_file:
-        content = await file.read()
-        image_file.write(content)
+    # Stream the uploaded image to disk
+    upload = await save_upload(file, upload_path(user_id, file.filename))
+    image_path = upload.path
 
     # Analyze the image
-    analysis_result = analyze_damage(str(image_path))
+    analysis_result = await run_cpu(analyze_damage, str(image_path))
 
     # Create database record
     damage_analysis = DamageAnalysis(
@@ -102,10 +74,12 @@ async def analyze_image(
         }
     )
 
+    return await run_io(save_analysis, session, damage_analysis)
+
+def save_analysis(session: Session, damage_analysis: DamageAnalysis) -> DamageAnalysis:
     session.add(damage_analysis)
     session.commit()
     session.refresh(damage_analysis)
-
     return damage_analysis
 
 @router.get("/history/{user_id}", response_model=List[DamageAnalysis])
@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
 from sqlmodel import Session, select
 from typing import List
-import os
-from datetime import datetime
 
 from app.db.database import get_session
 from app.db.models import DamageAnalysis, User
 from app.services.damage_detection import analyze_damage
+from app.services.executor import run_cpu, run_io
+from app.services.uploads import save_upload, upload_path
 
 router = APIRouter(prefix="/api", tags=["damage-detection"])
 
@@ -17,16 +17,12 @@ async def analyze_image(
     file: UploadFile = File(...),
     user_id: str
 ):
-    # Save the uploaded image
-    image_path = f"uploads/{user_id}/{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
-    os.makedirs(os.path.dirname(image_path), exist_ok=True)
-    
-    with open(image_path, "wb") as image_file:
-        content = await file.read()
-        image_file.write(content)
+    # Stream the uploaded image to disk
+    upload = await save_upload(file, upload_path(user_id, file.filename))
+    image_path = str(upload.path)
     
     # Analyze the image
-    analysis_result = analyze_damage(image_path)
+    analysis_result = await run_cpu(analyze_damage, image_path)
     
     # Create database record
     damage_analysis = DamageAnalysis(
@@ -40,6 +36,9 @@ async def analyze_image(
         confidence=analysis_result["confidence"]
     )
     
+    return await run_io(save_analysis, session, damage_analysis)
+
+def save_analysis(session: Session, damage_analysis: DamageAnalysis) -> DamageAnalysis:
     session.add(damage_analysis)
     session.commit()
     session.refresh(damage_analysis)
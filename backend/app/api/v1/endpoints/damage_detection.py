@@ -1,87 +1,271 @@
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, File, Query, UploadFile, HTTPException
+from sqlalchemy import and_, or_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime
+from typing import List, Optional, Tuple
+import asyncio
+import base64
+import copy
 import os
 from pathlib import Path
-import tensorflow as tf
 import numpy as np
-from PIL import Image
 
-from app.db.models import DamageAnalysis
-from app.db.database import get_session
+from app.db.models import AnalysisHistoryItem, BatchAnalysisResponse, DamageAnalysis, HistoryPage, VehicleRollup
+from app.db.database import async_engine, engine, get_async_session
+from app.db.write_batcher import WriteBehindBatcher
+from app.services.batching import MicroBatcher, QueueFullError
+from app.services.executor import cpu_pool, run_cpu, run_io
+from app.services.jobs import JobWorkerPool, QUEUED
+from app.services import metrics
+from app.services.metrics import STAGE_SECONDS, record_analysis
+from app.services.ml import (
+    PREPROCESSING_VERSION, CascadeStats, Localizer, active_model_path, cam_active, decode_into, escalation_mask,
+    get_cam_runtime, get_prescreen_runtime, get_runtime, heatmap_regions, normalize_inplace,
+    prescreen_preprocessor, registry, save_overlay, upright_size,
+)
+from app.services.pricing import get_rate_table
+from app.services.result_cache import ResultCache
+from app.services.uploads import extract_zip_images, file_sha256, is_zip_upload, save_upload, upload_path
+from app.services.video import VIDEO_EXTENSIONS, is_video_filename, score_video
+from app import config
 
 router = APIRouter(prefix="/api", tags=["damage-detection"])
 
-# Load the model
-model = None
-try:
-    model = tf.keras.models.load_model("model/damage_detection.h5")
-except:
-    print("Warning: Could not load model. Running in mock mode.")
+def get_model():
+    """Loaded inference runtime, or None to run in mock mode."""
+    runtime = get_runtime()
+    try:
+        runtime.load()
+    except Exception:
+        return None
+    # Load the pre-screen alongside, so model_version() never has to
+    get_prescreen_model()
+    return runtime
 
-def analyze_damage(image_path: str) -> dict:
-    """Analyze car damage from an image."""
+def get_prescreen_model():
+    """Loaded cascade pre-screen runtime, or None when the cascade is off or unavailable."""
+    if not config.CASCADE_ENABLED:
+        return None
+    runtime = get_prescreen_runtime()
     try:
-        if model is None:
-            # Mock response for testing
-            return {
-                "damage_detected": True,
-                "confidence": 0.85,
-                "severity": "Medium",
-                "damage_types": [{
-                    "type": "Scratch",
-                    "location": "Front bumper",
-                    "severity": "Medium",
-                    "coordinates": {"x": 100, "y": 150, "width": 50, "height": 30}
-                }],
-                "cost_estimation": {
-                    "total_cost": 800.0,
-                    "labor_cost": 300.0,
-                    "parts_cost": 400.0,
-                    "paint_cost": 100.0,
-                    "breakdown": [{
-                        "item": "Labor",
-                        "cost": 300.0,
-                        "description": "Repair work"
-                    }, {
-                        "item": "Parts",
-                        "cost": 400.0,
-                        "description": "Replacement parts"
-                    }, {
-                        "item": "Paint",
-                        "cost": 100.0,
-                        "description": "Repainting"
-                    }]
-                }
-            }
+        runtime.load()
+    except Exception:
+        return None
+    return runtime
+
+def cascade_active() -> bool:
+    return config.CASCADE_ENABLED and registry.is_loaded(config.PRESCREEN_MODEL_PATH)
+
+def model_version() -> str:
+    """Version tag used in result cache keys."""
+    version = config.MODEL_VERSION or f"{config.INFERENCE_BACKEND}:{registry.version(active_model_path())}"
+    if cascade_active():
+        # Early exits return the pre-screen's answer, so cascade settings change results
+        prescreen_version = registry.version(config.PRESCREEN_MODEL_PATH)
+        version += f":cascade-{config.CASCADE_LOW}-{config.CASCADE_HIGH}-{prescreen_version}"
+    if cam_active():
+        version += f":cam-{config.LOCALIZATION_CAM_THRESHOLD}-{config.LOCALIZATION_MAX_BOXES}"
+    elif config.LOCALIZATION_ENABLED:
+        version += (
+            f":loc-{config.LOCALIZATION_TILE_SCALE}-{config.LOCALIZATION_STRIDE}-{config.LOCALIZATION_THRESHOLD}"
+            f"-{config.LOCALIZATION_IOU}-{config.LOCALIZATION_MAX_BOXES}"
+        )
+    # Cached payloads include prices, so a rate table edit invalidates them too
+    return f"{version}:{PREPROCESSING_VERSION}:{get_rate_table().version}"
+
+result_cache = ResultCache(
+    engine,
+    max_memory_entries=config.RESULT_CACHE_MEMORY_ENTRIES,
+    max_db_entries=config.RESULT_CACHE_DB_ENTRIES,
+)
+
+@STAGE_SECONDS.time(stage="inference")
+def predict_batch(images: np.ndarray) -> np.ndarray:
+    """Run one forward pass over a stacked batch of preprocessed images."""
+    return get_runtime().predict(images)
+
+# Concurrent requests share forward passes through the micro-batcher
+batcher = MicroBatcher(
+    predict_batch,
+    max_batch_size=config.BATCH_MAX_SIZE,
+    max_wait_ms=config.BATCH_MAX_WAIT_MS,
+    max_queue_size=config.BATCH_MAX_QUEUE,
+    executor=cpu_pool,
+)
+
+@STAGE_SECONDS.time(stage="cam_inference")
+def cam_batch(images: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """One forward pass returning (prediction, Grad-CAM heatmap) per image."""
+    predictions, heatmaps = get_cam_runtime().predict_with_heatmaps(images)
+    return list(zip(predictions, heatmaps))
+
+# Classification and heatmap in one pass, used instead of batcher in "cam" mode
+cam_batcher = MicroBatcher(
+    cam_batch,
+    max_batch_size=config.BATCH_MAX_SIZE,
+    max_wait_ms=config.BATCH_MAX_WAIT_MS,
+    max_queue_size=config.BATCH_MAX_QUEUE,
+    executor=cpu_pool,
+)
+
+@STAGE_SECONDS.time(stage="preprocess")
+def preprocess_into(image_path: str, out: np.ndarray) -> np.ndarray:
+    """Decode and normalize an image into a preallocated (224, 224, 3) float32 slot."""
+    # Same steps as preprocessor.preprocess_into, split so decode time is visible
+    with STAGE_SECONDS.time(stage="decode"):
+        decode_into(image_path, out)
+    return normalize_inplace(out)
+
+def preprocess_image(image_path: str) -> np.ndarray:
+    """Load an image as a (224, 224, 3) array without the batch axis."""
+    return preprocess_into(image_path, np.empty((224, 224, 3), dtype=np.float32))
+
+@STAGE_SECONDS.time(stage="prescreen_inference")
+def prescreen_batch(images: np.ndarray) -> np.ndarray:
+    """One forward pass of the cascade pre-screen over a stacked 96x96 batch."""
+    return get_prescreen_runtime().predict(images)
+
+prescreen_batcher = MicroBatcher(
+    prescreen_batch,
+    max_batch_size=config.BATCH_MAX_SIZE,
+    max_wait_ms=config.BATCH_MAX_WAIT_MS,
+    max_queue_size=config.BATCH_MAX_QUEUE,
+    executor=cpu_pool,
+)
+
+@STAGE_SECONDS.time(stage="prescreen_preprocess")
+def preprocess_prescreen(image_path: str, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Decode and normalize an image at the pre-screen's 96x96 input size."""
+    if out is None:
+        out = prescreen_preprocessor.allocate(1)[0]
+    return prescreen_preprocessor.preprocess_into(image_path, out)
+
+LOCALIZATION_TILES = metrics.registry.register(metrics.Counter(
+    "motoscan_localization_tiles_total",
+    "Tiles scored by the full model to localize damage in tile mode.",
+))
+
+def predict_tiles(tiles: np.ndarray) -> np.ndarray:
+    """predict_batch for localization tiles, counted so their cost is visible next to the cascade's savings."""
+    LOCALIZATION_TILES.inc(len(tiles))
+    return predict_batch(tiles)
+
+localizer = Localizer(
+    predict_tiles,
+    tile_scale=config.LOCALIZATION_TILE_SCALE,
+    stride=config.LOCALIZATION_STRIDE,
+    threshold=config.LOCALIZATION_THRESHOLD,
+    iou_threshold=config.LOCALIZATION_IOU,
+    max_boxes=config.LOCALIZATION_MAX_BOXES,
+    fallback_to_best=True,
+)
+
+@STAGE_SECONDS.time(stage="localize")
+def localize(image_path: str) -> List[dict]:
+    """Damaged regions of a photo, from one batched forward pass over overlapping tiles."""
+    return localizer.localize(image_path)
+
+def heatmap_path(image_path: str) -> Path:
+    """Where the Grad-CAM overlay of an upload is stored."""
+    path = Path(image_path)
+    return path.with_name(f"{path.stem}.heatmap.png")
+
+@STAGE_SECONDS.time(stage="localize")
+def localize_heatmap(image_path: str, heatmap: np.ndarray, confidence: float) -> List[dict]:
+    """Damaged regions from a Grad-CAM heatmap, optionally saving its overlay."""
+    if config.HEATMAP_OVERLAYS:
+        save_overlay(image_path, heatmap, heatmap_path(image_path), max_side=config.HEATMAP_OVERLAY_MAX_SIDE)
+    width, height = upright_size(image_path)
+    return heatmap_regions(
+        heatmap, width, height, confidence,
+        threshold=config.LOCALIZATION_CAM_THRESHOLD,
+        max_boxes=config.LOCALIZATION_MAX_BOXES,
+    )
+
+async def locate(
+    image_path: str, confidence: float, heatmap: Optional[np.ndarray] = None
+) -> Optional[List[dict]]:
+    """Regions for a photo called damaged; None when it is undamaged or localization is off."""
+    if not config.LOCALIZATION_ENABLED or confidence <= 0.5:
+        return None
+    if heatmap is not None:
+        return await run_cpu(localize_heatmap, image_path, heatmap, confidence)
+    return await run_cpu(localize, image_path)
+
+cascade_stats = CascadeStats()
 
-        # Load and preprocess the image
-        img = Image.open(image_path)
-        img = img.resize((224, 224))
-        img_array = np.array(img) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
-
-        # Get prediction
-        prediction = model.predict(img_array)
-        confidence = float(prediction[0][0])
-        damage_detected = confidence > 0.5
-
-        # Generate analysis results
-        severity = "High" if confidence > 0.8 else "Medium" if confidence > 0.5 else "Low"
-
-        # Cost estimation based on severity
-        cost_estimation = {
-            "total_cost": 1500.0 if severity == "High" else 800.0 if severity == "Medium" else 300.0,
-            "labor_cost": 500.0 if severity == "High" else 300.0 if severity == "Medium" else 100.0,
-            "parts_cost": 700.0 if severity == "High" else 400.0 if severity == "Medium" else 150.0,
-            "paint_cost": 300.0 if severity == "High" else 100.0 if severity == "Medium" else 50.0,
-            "breakdown": [
-                {"item": "Labor", "cost": 500.0, "description": "Repair work"},
-                {"item": "Parts", "cost": 700.0, "description": "Replacement parts"},
-                {"item": "Paint", "cost": 300.0, "description": "Repainting"}
-            ] if severity == "High" else []
-        }
+CASCADE_DECISIONS = metrics.registry.register(metrics.Counter(
+    "motoscan_cascade_decisions_total",
+    "Cascade outcomes: early exit at the pre-screen or escalation to the full model.",
+    ("decision",),
+))
 
+def screen(scores: np.ndarray) -> np.ndarray:
+    """Escalation mask for pre-screen P(damage) scores, recorded in the cascade stats."""
+    escalate = escalation_mask(scores, config.CASCADE_LOW, config.CASCADE_HIGH)
+    cascade_stats.record(scores, escalate)
+    for score, escalated in zip(scores, escalate):
+        decision = "escalated" if escalated else "exit_damaged" if score > 0.5 else "exit_whole"
+        CASCADE_DECISIONS.inc(decision=decision)
+    return escalate
+
+# Mock response for testing
+MOCK_ANALYSIS = {
+    "damage_detected": True,
+    "confidence": 0.85,
+    "severity": "Medium",
+    "damage_types": [{
+        "type": "Scratch",
+        "location": "Front bumper",
+        "severity": "Medium",
+        "coordinates": {"x": 100, "y": 150, "width": 50, "height": 30}
+    }],
+    "cost_estimation": {
+        "total_cost": 800.0,
+        "labor_cost": 300.0,
+        "parts_cost": 400.0,
+        "paint_cost": 100.0,
+        "breakdown": [{
+            "item": "Labor",
+            "cost": 300.0,
+            "description": "Repair work"
+        }, {
+            "item": "Parts",
+            "cost": 400.0,
+            "description": "Replacement parts"
+        }, {
+            "item": "Paint",
+            "cost": 100.0,
+            "description": "Repainting"
+        }]
+    }
+}
+
+def severity_for(confidence: float) -> str:
+    return "High" if confidence > 0.8 else "Medium" if confidence > 0.5 else "Low"
+
+def describe_damage(confidence: float, regions: Optional[List[dict]] = None) -> dict:
+    """Turn the model's damage probability, and any localized regions, into an unpriced analysis."""
+    damage_detected = confidence > 0.5
+
+    # Generate analysis results
+    severity = severity_for(confidence)
+
+    if not damage_detected:
+        damage_types = []
+    elif regions:
+        damage_types = [
+            {
+                "type": "Dent" if region["score"] > 0.7 else "Scratch",
+                "location": region["location"],
+                "severity": severity_for(region["score"]),
+                "confidence": region["score"],
+                "coordinates": {key: region[key] for key in ("x", "y", "width", "height")}
+            }
+            for region in regions
+        ]
+    else:
         damage_types = [
             {
                 "type": "Dent" if confidence > 0.7 else "Scratch",
@@ -89,40 +273,134 @@ def analyze_damage(image_path: str) -> dict:
                 "severity": severity,
                 "coordinates": {"x": 100, "y": 150, "width": 50, "height": 30}
             }
-        ] if damage_detected else []
+        ]
+
+    return {
+        "damage_detected": damage_detected,
+        "confidence": confidence,
+        "severity": severity,
+        "damage_types": damage_types,
+    }
+
+def build_analyses(confidences: List[float], regions: List[Optional[List[dict]]]) -> List[dict]:
+    """Analysis payloads for several photos, all priced in one rate table call."""
+    analyses = [describe_damage(confidence, found) for confidence, found in zip(confidences, regions)]
+    costs = get_rate_table().estimate_many([analysis["damage_types"] for analysis in analyses])
+    for analysis, cost_estimation in zip(analyses, costs):
+        analysis["cost_estimation"] = cost_estimation
+    return analyses
+
+def build_analysis(confidence: float, regions: Optional[List[dict]] = None) -> dict:
+    """Turn the model's damage probability, and any localized regions, into the analysis payload."""
+    return build_analyses([confidence], [regions])[0]
 
-        return {
-            "damage_detected": damage_detected,
-            "confidence": confidence,
-            "severity": severity,
-            "damage_types": damage_types,
-            "cost_estimation": cost_estimation
-        }
+@STAGE_SECONDS.time(stage="analyze")
+async def analyze_damage(image_path: str) -> dict:
+    """Analyze car damage from an image."""
+    try:
+        # The first lookup deserializes the model, so keep it off the loop
+        if await run_cpu(get_model) is None:
+            return copy.deepcopy(MOCK_ANALYSIS)
+
+        # Cheap low-resolution pre-screen first; only uncertain photos pay for the full model
+        score = None
+        if await run_cpu(get_prescreen_model) is not None:
+            score = float((await prescreen_batcher.submit(await run_cpu(preprocess_prescreen, image_path)))[0])
+            if screen(np.array([score]))[0]:
+                score = None
+
+        heatmap = None
+        # In "cam" mode a damaged early exit still needs the full pass for its heatmap
+        if score is None or (score > 0.5 and cam_active()):
+            # Load and preprocess the image
+            img_array = await run_cpu(preprocess_image, image_path)
+
+            # Get prediction, batched with any other in-flight requests
+            if cam_active():
+                prediction, heatmap = await cam_batcher.submit(img_array)
+            else:
+                prediction = await batcher.submit(img_array)
+            score = float(prediction[0]) if score is None else score
+
+        # Damaged photos also get their damage localized
+        return build_analysis(score, await locate(image_path, score, heatmap))
 
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Analysis queue is full, please retry shortly")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing image: {str(e)}")
 
+# Inserts from concurrent analyze requests share one transaction
+write_batcher = WriteBehindBatcher(
+    async_engine,
+    max_batch_size=config.DB_WRITE_BATCH_SIZE,
+    max_wait_ms=config.DB_WRITE_BATCH_WAIT_MS,
+)
+
+async def analyze_job(image_path: str) -> dict:
+    """analyze_damage for a background job, sharing the synchronous path's result cache."""
+    if await run_cpu(get_model) is None:
+        return await analyze_damage(image_path)
+    cache_key = ResultCache.make_key(await run_io(file_sha256, image_path), model_version())
+    analysis_result = await run_io(result_cache.get, cache_key)
+    if analysis_result is None:
+        analysis_result = await analyze_damage(image_path)
+        await run_io(result_cache.put, cache_key, analysis_result)
+    return analysis_result
+
+# Uploads made with background=true are analyzed by these workers
+job_pool = JobWorkerPool(
+    engine,
+    analyze_job,
+    num_workers=config.JOB_WORKERS,
+    poll_interval=config.JOB_POLL_INTERVAL,
+)
+
 @router.post("/analyze", response_model=DamageAnalysis)
 async def analyze_image(
     *,
-    session: Session = Depends(get_session),
     file: UploadFile = File(...),
-    user_id: str
+    user_id: str,
+    background: bool = False
 ):
-    # Create uploads directory if it doesn't exist
-    uploads_dir = Path("uploads") / str(user_id)
-    uploads_dir.mkdir(parents=True, exist_ok=True)
+    """Analyze an uploaded photo.
+
+    With ``background=true`` the row is returned immediately with status
+    Queued; poll GET /api/analysis/{id} until it is Completed or Failed.
+
+    ``cost_estimation`` is the sum over the detected damage areas of the
+    rates in RATE_TABLE_PATH. With the shipped table, a photo with one
+    detected area costs 300, 800 or 1500 for Low, Medium or High severity.
+    """
+    # Stream the uploaded image to disk
+    upload = await save_upload(file, upload_path(user_id, file.filename))
+    image_path = upload.path
 
-    # Save the uploaded image
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    image_path = uploads_dir / f"{timestamp}_{file.filename}"
-    
-    with open(image_path, "wb") as image_file:
-        content = await file.read()
-        image_file.write(content)
+    # Analyze the image, reusing the stored result for a byte-identical upload
+    analysis_result = None
+    cache_key = None
+    if await run_cpu(get_model) is not None:
+        cache_key = ResultCache.make_key(upload.sha256, model_version())
+        analysis_result = await run_io(result_cache.get, cache_key)
 
-    # Analyze the image
-    analysis_result = analyze_damage(str(image_path))
+    if analysis_result is None and background:
+        damage_analysis = DamageAnalysis(
+            user_id=user_id,
+            image_uri=str(image_path),
+            damage_detected=False,
+            severity="Pending",
+            status=QUEUED,
+            confidence=0.0
+        )
+        damage_analysis = await write_batcher.add(damage_analysis)
+        job_pool.notify()
+        return damage_analysis
+
+    if analysis_result is None:
+        analysis_result = await analyze_damage(str(image_path))
+        if cache_key is not None:
+            await run_io(result_cache.put, cache_key, analysis_result)
+    record_analysis(analysis_result)
 
     # Create database record
     damage_analysis = DamageAnalysis(
@@ -136,21 +414,291 @@ async def analyze_image(
         confidence=analysis_result["confidence"]
     )
 
-    session.add(damage_analysis)
-    session.commit()
-    session.refresh(damage_analysis)
+    return await write_batcher.add(damage_analysis)
+
+SEVERITY_RANK = {"Low": 0, "Medium": 1, "High": 2}
+
+def vehicle_rollup(results: List[dict]) -> VehicleRollup:
+    """Worst severity and summed costs across all photos of one vehicle."""
+    costs = [result["cost_estimation"] for result in results]
+    return VehicleRollup(
+        image_count=len(results),
+        damaged_count=sum(1 for result in results if result["damage_detected"]),
+        severity=max((result["severity"] for result in results), key=lambda s: SEVERITY_RANK.get(s, -1)),
+        max_confidence=max(result["confidence"] for result in results),
+        total_cost=sum(cost.get("total_cost", 0.0) for cost in costs),
+        labor_cost=sum(cost.get("labor_cost", 0.0) for cost in costs),
+        parts_cost=sum(cost.get("parts_cost", 0.0) for cost in costs),
+        paint_cost=sum(cost.get("paint_cost", 0.0) for cost in costs),
+    )
+
+async def analyze_many(uploads: list) -> List[dict]:
+    """Analyze stored uploads with cache lookups and one forward pass for the misses."""
+    if await run_cpu(get_model) is None:
+        return [copy.deepcopy(MOCK_ANALYSIS) for _ in uploads]
+
+    version = model_version()
+    keys = [ResultCache.make_key(upload.sha256, version) for upload in uploads]
+    results = [await run_io(result_cache.get, key) for key in keys]
+    misses = [i for i, result in enumerate(results) if result is None]
+    if misses:
+        scores = {}
+        try:
+            escalated = misses
+            if await run_cpu(get_prescreen_model) is not None:
+                small = prescreen_preprocessor.allocate(len(misses))
+                await asyncio.gather(
+                    *(run_cpu(preprocess_prescreen, str(uploads[i].path), small[j]) for j, i in enumerate(misses))
+                )
+                screen_scores = (await run_cpu(prescreen_batch, small))[:, 0]
+                escalate = screen(screen_scores)
+                scores = {i: float(s) for i, s, e in zip(misses, screen_scores, escalate) if not e}
+                escalated = [i for i, e in zip(misses, escalate) if e]
 
-    return damage_analysis
+            heatmaps = {}
+            full = escalated
+            if cam_active():
+                # Damaged early exits still need the full pass for their heatmap
+                full = [i for i in misses if i in escalated or scores[i] > 0.5]
+            if full:
+                # Decode in parallel straight into the batch that goes to the model
+                batch = np.empty((len(full), 224, 224, 3), dtype=np.float32)
+                await asyncio.gather(
+                    *(run_cpu(preprocess_into, str(uploads[i].path), batch[j]) for j, i in enumerate(full))
+                )
+                if cam_active():
+                    outputs = await run_cpu(cam_batch, batch)
+                    predictions = [prediction for prediction, _ in outputs]
+                    heatmaps = {i: heatmap for i, (_, heatmap) in zip(full, outputs)}
+                else:
+                    predictions = await run_cpu(predict_batch, batch)
+                for i, prediction in zip(full, predictions):
+                    scores.setdefault(i, float(prediction[0]))
+            regions = await asyncio.gather(
+                *(locate(str(uploads[i].path), scores[i], heatmaps.get(i)) for i in misses)
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error analyzing images: {str(e)}")
+        for i, result in zip(misses, build_analyses([scores[i] for i in misses], regions)):
+            results[i] = result
+            await run_io(result_cache.put, keys[i], results[i])
+    return results
 
-@router.get("/{user_id}/history", response_model=list[DamageAnalysis])
-def get_user_history(
+
+@router.post("/analyze/batch", response_model=BatchAnalysisResponse)
+async def analyze_batch(
     *,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
+    files: List[UploadFile] = File(...),
     user_id: str
 ):
-    analyses = session.exec(
-        select(DamageAnalysis)
-        .where(DamageAnalysis.user_id == user_id)
-        .order_by(DamageAnalysis.analysis_date.desc())
-    ).all()
-    return analyses
+    """Analyze all photos of one vehicle, given as several files and/or zip archives."""
+    if len(files) > config.BATCH_UPLOAD_MAX_FILES:
+        raise HTTPException(status_code=413, detail=f"At most {config.BATCH_UPLOAD_MAX_FILES} images per batch")
+
+    uploads = []
+    for file in files:
+        upload = await save_upload(file, upload_path(user_id, file.filename))
+        if is_zip_upload(file):
+            remaining = config.BATCH_UPLOAD_MAX_FILES - len(uploads)
+            try:
+                uploads += await run_io(extract_zip_images, upload.path, upload.path.parent, remaining)
+            finally:
+                await run_io(upload.path.unlink)
+        else:
+            uploads.append(upload)
+        if len(uploads) > config.BATCH_UPLOAD_MAX_FILES:
+            raise HTTPException(status_code=413, detail=f"At most {config.BATCH_UPLOAD_MAX_FILES} images per batch")
+    if not uploads:
+        raise HTTPException(status_code=400, detail="No images found in the upload")
+
+    results = await analyze_many(uploads)
+
+    analyses = [
+        DamageAnalysis(
+            user_id=user_id,
+            image_uri=str(upload.path),
+            damage_detected=result["damage_detected"],
+            damage_types=result["damage_types"],
+            severity=result["severity"],
+            cost_estimation=result["cost_estimation"],
+            status="Completed",
+            confidence=result["confidence"]
+        )
+        for upload, result in zip(uploads, results)
+    ]
+    # All rows of the vehicle go in one transaction
+    session.add_all(analyses)
+    with STAGE_SECONDS.time(stage="db_commit"):
+        await session.commit()
+    for result in results:
+        record_analysis(result)
+
+    return BatchAnalysisResponse(analyses=analyses, rollup=vehicle_rollup(results))
+
+def mock_predict(batch: np.ndarray) -> np.ndarray:
+    """Stand-in forward pass for mock mode that scores every frame like MOCK_ANALYSIS."""
+    confidence = MOCK_ANALYSIS["confidence"]
+    return np.tile([confidence, 1.0 - confidence], (len(batch), 1))
+
+@router.post("/analyze/video", response_model=DamageAnalysis)
+async def analyze_video(
+    *,
+    file: UploadFile = File(...),
+    user_id: str,
+    sampling: str = Query("interval", regex="^(interval|scene)$"),
+    interval: float = Query(config.VIDEO_SAMPLE_INTERVAL_S, gt=0, le=60)
+):
+    """Analyze a walk-around video of one vehicle.
+
+    A frame is sampled every ``interval`` seconds (``sampling=interval``), or
+    checked at that spacing and kept on a scene change (``sampling=scene``).
+    Sampled frames are scored in batches; the most damaged-looking frame
+    decides the result and every frame's confidence is kept in
+    ``frame_confidences``.
+    """
+    if not is_video_filename(file.filename):
+        raise HTTPException(status_code=400, detail=f"Unsupported video format, expected one of {VIDEO_EXTENSIONS}")
+    upload = await save_upload(file, upload_path(user_id, file.filename), max_bytes=config.VIDEO_UPLOAD_MAX_BYTES)
+
+    predict_fn = predict_batch if await run_cpu(get_model) is not None else mock_predict
+    try:
+        scores = await run_cpu(score_video, str(upload.path), predict_fn, mode=sampling, interval_s=interval)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing video: {str(e)}")
+    if not scores:
+        raise HTTPException(status_code=400, detail="No frames could be read from the video")
+
+    worst = max(scores, key=lambda score: score.confidence)
+    analysis_result = build_analysis(worst.confidence)
+    for damage_type in analysis_result["damage_types"]:
+        damage_type["timestamp"] = worst.timestamp
+    record_analysis(analysis_result)
+
+    damage_analysis = DamageAnalysis(
+        user_id=user_id,
+        image_uri=str(upload.path),
+        damage_detected=analysis_result["damage_detected"],
+        damage_types=analysis_result["damage_types"],
+        severity=analysis_result["severity"],
+        cost_estimation=analysis_result["cost_estimation"],
+        status="Completed",
+        confidence=analysis_result["confidence"],
+        frame_confidences=[score._asdict() for score in scores]
+    )
+    return await write_batcher.add(damage_analysis)
+
+@router.get("/analysis/{analysis_id}", response_model=DamageAnalysis)
+async def get_analysis(*, session: AsyncSession = Depends(get_async_session), analysis_id: int):
+    """Fetch one analysis; also the status poll for background jobs."""
+    analysis = await session.get(DamageAnalysis, analysis_id)
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    return analysis
+
+@router.get("/jobs/stats")
+def get_job_stats():
+    """Queue depth and outcome counters of the background analysis workers."""
+    return {
+        "workers": job_pool.num_workers,
+        "queued": job_pool.queue_depth(),
+        "completed": job_pool.completed,
+        "failed": job_pool.failed,
+    }
+
+@router.get("/batching/stats")
+def get_batching_stats():
+    """Queue-wait and batch-size statistics of the inference micro-batcher."""
+    return {
+        "max_batch_size": batcher.max_batch_size,
+        "max_wait_ms": batcher.max_wait * 1000,
+        "max_queue_size": batcher.max_queue_size,
+        "queue_depth": batcher.queue_depth,
+        **batcher.stats.as_dict(),
+    }
+
+@router.get("/cascade/stats")
+def get_cascade_stats():
+    """Share of analyses answered by the pre-screen versus escalated to the full model."""
+    return {
+        "enabled": config.CASCADE_ENABLED,
+        "active": cascade_active(),
+        "low": config.CASCADE_LOW,
+        "high": config.CASCADE_HIGH,
+        **cascade_stats.as_dict(),
+        # Extra full-model inputs spent on tile localization of damaged photos
+        "localization_tiles": int(LOCALIZATION_TILES.value()),
+    }
+
+@router.get("/db/stats")
+def get_db_stats():
+    """Rows and transactions written by the write-behind batcher."""
+    return write_batcher.stats()
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """Hit/miss counters of the content-addressed result cache."""
+    return result_cache.stats()
+
+HISTORY_SUMMARY_COLUMNS = (
+    DamageAnalysis.id,
+    DamageAnalysis.user_id,
+    DamageAnalysis.image_uri,
+    DamageAnalysis.analysis_date,
+    DamageAnalysis.damage_detected,
+    DamageAnalysis.severity,
+    DamageAnalysis.status,
+    DamageAnalysis.confidence,
+)
+
+def encode_cursor(analysis_date: datetime, analysis_id: int) -> str:
+    raw = f"{analysis_date.isoformat()}|{analysis_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        analysis_date, analysis_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(analysis_date), int(analysis_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid history cursor")
+
+@router.get("/{user_id}/history", response_model=HistoryPage)
+async def get_user_history(
+    *,
+    session: AsyncSession = Depends(get_async_session),
+    user_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    include_details: bool = False
+):
+    """Newest-first history, paginated by (analysis_date, id).
+
+    Pass ``next_cursor`` from the previous page as ``cursor`` to continue.
+    The damage_types/cost_estimation JSON is only loaded with
+    ``include_details=true``.
+    """
+    columns = HISTORY_SUMMARY_COLUMNS
+    if include_details:
+        columns += (DamageAnalysis.damage_types, DamageAnalysis.cost_estimation)
+
+    query = select(*columns).where(DamageAnalysis.user_id == user_id)
+    if cursor is not None:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.where(or_(
+            DamageAnalysis.analysis_date < cursor_date,
+            and_(DamageAnalysis.analysis_date == cursor_date, DamageAnalysis.id < cursor_id),
+        ))
+    # One extra row tells us whether another page exists without a COUNT
+    rows = (await session.exec(
+        query
+        .order_by(DamageAnalysis.analysis_date.desc(), DamageAnalysis.id.desc())
+        .limit(limit + 1)
+    )).all()
+
+    has_more = len(rows) > limit
+    items = [AnalysisHistoryItem(**row._mapping) for row in rows[:limit]]
+    next_cursor = encode_cursor(items[-1].analysis_date, items[-1].id) if has_more else None
+    return HistoryPage(items=items, next_cursor=next_cursor, has_more=has_more)
@@ -0,0 +1,93 @@
+import os
+from pathlib import Path
+
+# The backend directory, so model paths don't depend on the working directory
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# SQLite database file
+DATABASE_PATH = os.getenv("DATABASE_PATH", str(BASE_DIR / "data" / "database.db"))
+
+# Detection model
+MODEL_PATH = os.getenv("MODEL_PATH", str(BASE_DIR / "model" / "damage_detection.h5"))
+# Inference runtime: "keras" runs MODEL_PATH, "tflite" runs TFLITE_MODEL_PATH
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "keras")
+TFLITE_MODEL_PATH = os.getenv("TFLITE_MODEL_PATH", str(BASE_DIR / "model" / "damage_detection_fp16.tflite"))
+# Explicit version tag for cache keys; derived from the model file when unset
+MODEL_VERSION = os.getenv("MODEL_VERSION")
+# Early-exit cascade: a 96x96 pre-screen model answers confident photos and
+# only pre-screen P(damage) within [CASCADE_LOW, CASCADE_HIGH] reaches the full model
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "0") == "1"
+PRESCREEN_MODEL_PATH = os.getenv("PRESCREEN_MODEL_PATH", str(BASE_DIR / "model" / "damage_prescreen.h5"))
+PRESCREEN_BACKEND = os.getenv("PRESCREEN_BACKEND", "keras")
+CASCADE_LOW = float(os.getenv("CASCADE_LOW", "0.3"))
+CASCADE_HIGH = float(os.getenv("CASCADE_HIGH", "0.7"))
+# Tile-based localization of detected damage: square tiles LOCALIZATION_TILE_SCALE
+# of the shorter photo side, LOCALIZATION_STRIDE of a tile apart, all scored in one
+# forward pass. Larger scale or stride means fewer tiles: faster but coarser boxes.
+# Off by default: every tile is a full-model input, so with the defaults (0.5, 0.5)
+# a damaged 4:3 photo costs about 15 extra images of inference, more than the
+# cascade saves on it. Tiles scored are counted in /api/cascade/stats and as
+# motoscan_localization_tiles_total. "cam" mode below costs no extra images.
+LOCALIZATION_ENABLED = os.getenv("LOCALIZATION_ENABLED", "0") == "1"
+# "tiles", or "cam" for Grad-CAM heatmaps from the classification pass itself
+# (cheaper, coarser; needs the keras backend, falls back to tiles otherwise)
+LOCALIZATION_MODE = os.getenv("LOCALIZATION_MODE", "tiles")
+LOCALIZATION_TILE_SCALE = float(os.getenv("LOCALIZATION_TILE_SCALE", "0.5"))
+LOCALIZATION_STRIDE = float(os.getenv("LOCALIZATION_STRIDE", "0.5"))
+LOCALIZATION_THRESHOLD = float(os.getenv("LOCALIZATION_THRESHOLD", "0.6"))
+LOCALIZATION_IOU = float(os.getenv("LOCALIZATION_IOU", "0.3"))
+LOCALIZATION_MAX_BOXES = int(os.getenv("LOCALIZATION_MAX_BOXES", "5"))
+# Share of the peak Grad-CAM heat that counts as damaged in "cam" mode
+LOCALIZATION_CAM_THRESHOLD = float(os.getenv("LOCALIZATION_CAM_THRESHOLD", "0.5"))
+# Save Grad-CAM overlays as <upload>.heatmap.png next to the upload
+HEATMAP_OVERLAYS = os.getenv("HEATMAP_OVERLAYS", "0") == "1"
+HEATMAP_OVERLAY_MAX_SIDE = int(os.getenv("HEATMAP_OVERLAY_MAX_SIDE", "512"))
+# Repair rate table (damage type x location x severity -> labor, parts, paint),
+# reloaded when the file changes
+RATE_TABLE_PATH = os.getenv("RATE_TABLE_PATH", str(BASE_DIR / "data" / "repair_rates.csv"))
+# Load the model and run one dummy forward pass in the background at startup
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") == "1"
+
+# Micro-batching inference engine
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
+BATCH_MAX_QUEUE = int(os.getenv("BATCH_MAX_QUEUE", "256"))
+
+# Execution pools for blocking work kept off the event loop
+IO_WORKERS = int(os.getenv("IO_WORKERS", "16"))
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 1)))
+
+# Streaming uploads
+UPLOADS_DIR = os.getenv("UPLOADS_DIR", "uploads")
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(25 * 1024 * 1024)))
+
+# Content-addressed result cache
+RESULT_CACHE_MEMORY_ENTRIES = int(os.getenv("RESULT_CACHE_MEMORY_ENTRIES", "1024"))
+RESULT_CACHE_DB_ENTRIES = int(os.getenv("RESULT_CACHE_DB_ENTRIES", "100000"))
+
+# Multi-image batch analysis
+BATCH_UPLOAD_MAX_FILES = int(os.getenv("BATCH_UPLOAD_MAX_FILES", "50"))
+
+# Walk-around video analysis (POST /api/analyze/video)
+VIDEO_UPLOAD_MAX_BYTES = int(os.getenv("VIDEO_UPLOAD_MAX_BYTES", str(200 * 1024 * 1024)))
+VIDEO_SAMPLE_INTERVAL_S = float(os.getenv("VIDEO_SAMPLE_INTERVAL_S", "0.5"))
+VIDEO_SCENE_THRESHOLD = float(os.getenv("VIDEO_SCENE_THRESHOLD", "12"))
+VIDEO_MAX_SAMPLES = int(os.getenv("VIDEO_MAX_SAMPLES", "240"))
+VIDEO_BATCH_SIZE = int(os.getenv("VIDEO_BATCH_SIZE", "16"))
+
+# Background analysis jobs (POST /api/analyze?background=true)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+
+# SQLite tuning and connection pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_CACHE_SIZE_KIB = int(os.getenv("DB_CACHE_SIZE_KIB", str(64 * 1024)))
+
+# Write-behind batching of DamageAnalysis inserts
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "64"))
+DB_WRITE_BATCH_WAIT_MS = float(os.getenv("DB_WRITE_BATCH_WAIT_MS", "5"))
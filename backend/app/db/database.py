@@ -1,26 +1,109 @@
+from sqlalchemy import event, inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pathlib import Path
 import os
+import time
 
-# Get the base directory
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
+from app import config
+from app.services.metrics import STAGE_SECONDS
 
 # Create database directory if it doesn't exist
-db_dir = BASE_DIR / "data"
-db_dir.mkdir(exist_ok=True)
+db_path = Path(config.DATABASE_PATH)
+db_path.parent.mkdir(parents=True, exist_ok=True)
 
 # SQLite database URL
-DATABASE_URL = f"sqlite:///{db_dir}/database.db"
+DATABASE_URL = f"sqlite:///{db_path}"
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{db_path}"
 
-# Create engine
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Per-connection SQLite settings, applied as the pool opens each connection."""
+    cursor = dbapi_connection.cursor()
+    # WAL lets history reads proceed while an analysis is being written
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # Durable at checkpoints; safe against corruption in WAL mode and far fewer fsyncs
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={config.DB_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={config.DB_MMAP_SIZE}")
+    # Negative cache_size is in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size=-{config.DB_CACHE_SIZE_KIB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the per-statement context, so a statement that fails leaves nothing behind
+    if context is not None:
+        context.query_start = time.perf_counter()
+
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "query_start", None)
+    if start is not None:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="db_query")
+
+def instrument_engine(sync_engine):
+    """Time every statement executed through ``sync_engine``."""
+    event.listen(sync_engine, "before_cursor_execute", _query_started)
+    event.listen(sync_engine, "after_cursor_execute", _query_finished)
+
+def make_engine(url: str = DATABASE_URL):
+    """SQLite engine with WAL pragmas and an explicit connection pool."""
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": config.DB_BUSY_TIMEOUT_MS / 1000},
+        poolclass=QueuePool,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+    )
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    instrument_engine(engine)
+    return engine
+
+def make_async_engine(url: str = ASYNC_DATABASE_URL):
+    """aiosqlite engine with the same pragmas and pool sizing as make_engine."""
+    engine = create_async_engine(
+        url,
+        connect_args={"timeout": config.DB_BUSY_TIMEOUT_MS / 1000},
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+    )
+    event.listen(engine.sync_engine, "connect", set_sqlite_pragmas)
+    instrument_engine(engine.sync_engine)
+    return engine
+
+# Create engines: sync for startup, scripts and background workers, async for routes
+engine = make_engine()
+async_engine = make_async_engine()
 
 def get_session():
     with Session(engine) as session:
         yield session
 
+async def get_async_session():
+    # Rows stay readable after commit without a refresh round trip
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    # create_all skips tables that already exist, so add indexes introduced later
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    add_missing_columns()
+
+def add_missing_columns():
+    """Add nullable columns introduced after a table was first created."""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
@@ -1,5 +1,6 @@
 from typing import Optional, List, Dict
 from datetime import datetime
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, JSON
 
 class User(SQLModel, table=True):
@@ -12,13 +13,65 @@ class User(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class DamageAnalysis(SQLModel, table=True):
+    # Serves the keyset-paginated history query (newest first per user)
+    __table_args__ = (
+        Index("ix_damageanalysis_user_date_id", "user_id", "analysis_date", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: str = Field(index=True)
     image_uri: str
     analysis_date: datetime = Field(default_factory=datetime.utcnow)
     damage_detected: bool
-    damage_types: Dict = Field(default={}, sa_type=JSON)
+    damage_types: List[Dict] = Field(default=[], sa_type=JSON)
     severity: str
     cost_estimation: Dict = Field(default={}, sa_type=JSON)
     status: str = Field(index=True)
     confidence: float
+    # Per sampled frame {"timestamp", "confidence"} for video analyses
+    frame_confidences: Optional[List[Dict]] = Field(default=None, sa_type=JSON)
+    # Why a background job ended up Failed
+    error: Optional[str] = None
+
+
+class AnalysisCache(SQLModel, table=True):
+    key: str = Field(primary_key=True)
+    payload: Dict = Field(default={}, sa_type=JSON)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_used_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class VehicleRollup(SQLModel):
+    image_count: int
+    damaged_count: int
+    severity: str
+    max_confidence: float
+    total_cost: float
+    labor_cost: float
+    parts_cost: float
+    paint_cost: float
+
+
+class BatchAnalysisResponse(SQLModel):
+    analyses: List[DamageAnalysis]
+    rollup: VehicleRollup
+
+
+class AnalysisHistoryItem(SQLModel):
+    id: int
+    user_id: str
+    image_uri: str
+    analysis_date: datetime
+    damage_detected: bool
+    severity: str
+    status: str
+    confidence: float
+    # Only filled when the history is requested with include_details=true
+    damage_types: Optional[List[Dict]] = None
+    cost_estimation: Optional[Dict] = None
+
+
+class HistoryPage(SQLModel):
+    items: List[AnalysisHistoryItem]
+    next_cursor: Optional[str] = None
+    has_more: bool
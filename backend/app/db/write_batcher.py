@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.services.metrics import STAGE_SECONDS
+
+# Queued by stop() to tell the worker to drain and exit
+_STOP = object()
+
+
+class WriteBatcherStopped(RuntimeError):
+    """A row was never committed because the batcher shut down."""
+
+
+def _fail(batch: List[Tuple[SQLModel, asyncio.Future]], error: Exception):
+    for _, future in batch:
+        if not future.done():
+            future.set_exception(error)
+
+
+class WriteBehindBatcher:
+    """Groups row inserts from concurrent requests into one transaction.
+
+    ``add`` resolves once the row is committed, with its primary key set.
+    Flushes happen when ``max_batch_size`` rows are pending or
+    ``max_wait_ms`` after the first one arrived, so under load one fsync
+    covers many analyses instead of one each.
+    """
+
+    def __init__(self, engine: AsyncEngine, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.rows = 0
+        self.transactions = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._worker is not None and not self._worker.done():
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Commit every row added so far, then stop the worker.
+
+        The worker finishes the flush it is in, drains the queue and exits;
+        only rows it could not get to are failed with WriteBatcherStopped.
+        """
+        if self._worker is None:
+            return
+        worker, queue = self._worker, self._queue
+        self._worker = None
+        queue.put_nowait(_STOP)
+        try:
+            await worker
+        except Exception:
+            logging.exception("Write-behind worker failed while draining")
+        leftover = []
+        while not queue.empty():
+            item = queue.get_nowait()
+            if item is not _STOP:
+                leftover.append(item)
+        _fail(leftover, WriteBatcherStopped("Write batcher stopped before the row was committed"))
+
+    async def add(self, row: SQLModel) -> SQLModel:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((row, future))
+        return await future
+
+    def stats(self) -> dict:
+        return {
+            "rows": self.rows,
+            "transactions": self.transactions,
+            "avg_rows_per_transaction": self.rows / self.transactions if self.transactions else 0.0,
+        }
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush_or_fail(batch)
+
+        # stop() was called: commit what is still queued without waiting for more
+        pending = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                pending.append(item)
+        for start in range(0, len(pending), self.max_batch_size):
+            await self._flush_or_fail(pending[start:start + self.max_batch_size])
+
+    async def _flush_or_fail(self, batch: List[Tuple[SQLModel, asyncio.Future]]):
+        try:
+            await self._flush(batch)
+        except BaseException as e:
+            # Cancelled mid-commit: nobody may be left waiting on this batch
+            _fail(batch, WriteBatcherStopped(f"Write batch was interrupted: {e!r}"))
+            raise
+
+    async def _flush(self, batch: List[Tuple[SQLModel, asyncio.Future]]):
+        rows = [row for row, _ in batch]
+        try:
+            await self._commit(rows)
+            self.transactions += 1
+        except Exception:
+            # Don't let one bad row fail everyone else's insert
+            for row, future in batch:
+                try:
+                    await self._commit([row])
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+                self.transactions += 1
+                self.rows += 1
+                if not future.done():
+                    future.set_result(row)
+            return
+        self.rows += len(rows)
+        for row, future in batch:
+            if not future.done():
+                future.set_result(row)
+
+    @STAGE_SECONDS.time(stage="db_commit")
+    async def _commit(self, rows: List[SQLModel]):
+        # Keep attributes loaded after commit so callers can serialize the rows
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            session.add_all(rows)
+            await session.commit()
@@ -0,0 +1,316 @@
+"""
+Resumable bulk re-pricing and re-scoring of stored analyses.
+
+After a rate table or model change, Completed ``DamageAnalysis`` rows are
+streamed from SQLite in id order and rewritten in batched transactions:
+
+* ``reprice`` recomputes ``cost_estimation`` from the stored damage_types
+  with the current rate table, a whole chunk per vectorized call;
+* ``rescore`` re-runs the full model (and localization) on the stored
+  ``image_uri`` photos in batches and rewrites confidence, severity,
+  damage_types and cost_estimation. Video analyses are skipped.
+
+Progress is checkpointed after every committed chunk, so an interrupted run
+continues with ``--resume``. Run from the backend directory::
+
+    python -m app.services.backfill reprice
+    python -m app.services.backfill rescore --batch-size 32 --resume
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.engine import Engine, Row
+
+from app import config
+from app.db.models import DamageAnalysis
+from app.services.jobs import COMPLETED
+
+table = DamageAnalysis.__table__
+
+MODES = ("reprice", "rescore")
+RESCORED_COLUMNS = ("confidence", "damage_detected", "severity", "damage_types", "cost_estimation")
+
+
+def row_filter(mode: str) -> list:
+    conditions = [table.c.status == COMPLETED]
+    if mode == "rescore":
+        # Video rows point at a clip, and their result is the worst sampled frame. The
+        # column holds SQL NULL for rows older than it and JSON null for newer ones.
+        conditions.append(func.coalesce(func.json_type(table.c.frame_confidences), "null") == "null")
+    return conditions
+
+
+def stream_chunks(
+    engine: Engine, columns: Sequence, conditions: list, after_id: int, chunk_size: int, window: int
+) -> Iterator[List[Row]]:
+    """Rows with id > ``after_id`` in id order, ``chunk_size`` at a time.
+
+    Each window of rows is read through one streaming cursor and fetched a
+    chunk at a time; a new cursor per window means a long backfill never
+    pins one WAL snapshot (and so the WAL file) for its whole run.
+    """
+    while True:
+        query = (
+            select(table.c.id, *columns)
+            .where(table.c.id > after_id, *conditions)
+            .order_by(table.c.id)
+            .limit(window)
+        )
+        seen = 0
+        with engine.connect() as connection:
+            result = connection.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+            for chunk in result.partitions():
+                seen += len(chunk)
+                after_id = chunk[-1].id
+                yield chunk
+        if seen < window:
+            return
+
+
+def write_updates(engine: Engine, updates: List[Dict]):
+    """Apply ``{"row_id": id, column: value, ...}`` updates in one transaction."""
+    if not updates:
+        return
+    statement = table.update().where(table.c.id == bindparam("row_id"))
+    with engine.begin() as connection:
+        connection.execute(statement, updates)
+
+
+def reprice_chunk(rows: List[Row]) -> List[Dict]:
+    """New cost_estimation for every row whose price changed."""
+    from app.services.pricing import get_rate_table
+
+    costs = get_rate_table().estimate_many([row.damage_types or [] for row in rows])
+    return [
+        {"row_id": row.id, "cost_estimation": cost}
+        for row, cost in zip(rows, costs)
+        if cost != row.cost_estimation
+    ]
+
+
+def _decode(image_path: str, out: np.ndarray) -> bool:
+    from app.api.v1.endpoints.damage_detection import preprocess_into
+
+    try:
+        preprocess_into(image_path, out)
+    except Exception:
+        return False
+    return True
+
+
+class Rescorer:
+    """Batched inference over stored photos, decoding the next batch while the current one is scored."""
+
+    def __init__(self, batch_size: int, workers: int, localize: bool = True):
+        from app.api.v1.endpoints import damage_detection
+
+        self.endpoints = damage_detection
+        self.batch_size = batch_size
+        self.localize = localize and config.LOCALIZATION_ENABLED
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill")
+        self.buffers = [np.empty((batch_size, 224, 224, 3), dtype=np.float32) for _ in range(2)]
+        self.unreadable = 0
+
+    def close(self):
+        self.pool.shutdown()
+
+    def _submit(self, rows: List[Row], out: np.ndarray) -> list:
+        return [self.pool.submit(_decode, row.image_uri, out[j]) for j, row in enumerate(rows)]
+
+    def _predict(self, batch: np.ndarray):
+        """(P(damage) per image, Grad-CAM heatmaps or None)."""
+        if self.endpoints.cam_active():
+            outputs = self.endpoints.cam_batch(batch)
+            return [float(prediction[0]) for prediction, _ in outputs], [heatmap for _, heatmap in outputs]
+        return [float(score) for score in self.endpoints.predict_batch(batch)[:, 0]], None
+
+    def _regions(self, image_path: str, score: float, heatmap: Optional[np.ndarray]):
+        if not self.localize or score <= 0.5:
+            return None
+        if heatmap is not None:
+            return self.endpoints.localize_heatmap(image_path, heatmap, score)
+        return self.endpoints.localize(image_path)
+
+    def __call__(self, rows: List[Row]) -> List[Dict]:
+        batches = [rows[i:i + self.batch_size] for i in range(0, len(rows), self.batch_size)]
+        scored, scores, regions = [], [], []
+        pending = self._submit(batches[0], self.buffers[0]) if batches else []
+        for k, batch_rows in enumerate(batches):
+            decoded = [future.result() for future in pending]
+            out = self.buffers[k % 2]
+            if k + 1 < len(batches):
+                pending = self._submit(batches[k + 1], self.buffers[(k + 1) % 2])
+
+            ok = [j for j, good in enumerate(decoded) if good]
+            self.unreadable += len(decoded) - len(ok)
+            if not ok:
+                continue
+            batch_scores, heatmaps = self._predict(out[ok] if len(ok) < len(decoded) else out[:len(ok)])
+            batch_regions = self.pool.map(
+                self._regions,
+                [batch_rows[j].image_uri for j in ok],
+                batch_scores,
+                heatmaps or [None] * len(ok),
+            )
+            scored += [batch_rows[j] for j in ok]
+            scores += batch_scores
+            regions += list(batch_regions)
+
+        analyses = self.endpoints.build_analyses(scores, regions)
+        return [
+            {"row_id": row.id, **{column: analysis[column] for column in RESCORED_COLUMNS}}
+            for row, analysis in zip(scored, analyses)
+        ]
+
+
+class Progress:
+    """Rows processed and written, with throughput and ETA, printed at most every ``interval`` seconds."""
+
+    def __init__(self, total: int, done: int = 0, interval: float = 1.0, stream=sys.stderr):
+        self.total = total
+        self.done = done
+        self.processed = 0
+        self.updated = 0
+        self.interval = interval
+        self.stream = stream
+        self.started = time.perf_counter()
+        self._last_report = 0.0
+
+    def add(self, rows: int, updated: int):
+        self.processed += rows
+        self.updated += updated
+        if time.perf_counter() - self._last_report >= self.interval:
+            self.report()
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def report(self, end: str = ""):
+        self._last_report = time.perf_counter()
+        rate = self.rows_per_second
+        remaining = max(self.total - self.processed, 0)
+        eta = f"{remaining / rate:.0f}s" if rate > 0 else "?"
+        print(
+            f"\r{self.done + self.processed}/{self.done + self.total} rows, {self.updated} updated, "
+            f"{rate:.0f} rows/sec, ETA {eta}   ",
+            end=end, file=self.stream, flush=True,
+        )
+
+    def as_dict(self) -> Dict:
+        return {
+            "processed": self.processed,
+            "updated": self.updated,
+            "seconds": round(time.perf_counter() - self.started, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def load_checkpoint(path: str, mode: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint["mode"] != mode or checkpoint["database"] != os.path.abspath(config.DATABASE_PATH):
+        raise SystemExit(f"{path} belongs to a {checkpoint['mode']} run on {checkpoint['database']}")
+    return checkpoint
+
+
+def save_checkpoint(path: str, checkpoint: Dict):
+    # Written to a temp file and renamed so a crash never leaves half a checkpoint
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+
+def backfill(
+    engine: Engine,
+    mode: str,
+    process_chunk: Callable[[List[Row]], List[Dict]],
+    chunk_size: int = 1000,
+    window: int = 50_000,
+    checkpoint_path: Optional[str] = None,
+    resume: bool = False,
+    dry_run: bool = False,
+) -> Dict:
+    """Stream matching rows through ``process_chunk`` and write back the updates it returns."""
+    checkpoint = load_checkpoint(checkpoint_path, mode) if resume and checkpoint_path else None
+    if checkpoint is None:
+        checkpoint = {"mode": mode, "database": os.path.abspath(config.DATABASE_PATH), "last_id": 0,
+                      "processed": 0, "updated": 0}
+    else:
+        print(f"Resuming after row {checkpoint['last_id']} ({checkpoint['processed']} rows done)", file=sys.stderr)
+
+    conditions = row_filter(mode)
+    with engine.connect() as connection:
+        total = connection.execute(
+            select(func.count()).select_from(table).where(table.c.id > checkpoint["last_id"], *conditions)
+        ).scalar_one()
+
+    columns = (table.c.damage_types, table.c.cost_estimation) if mode == "reprice" else (table.c.image_uri,)
+    progress = Progress(total, done=checkpoint["processed"])
+    for rows in stream_chunks(engine, columns, conditions, checkpoint["last_id"], chunk_size, window):
+        updates = process_chunk(rows)
+        if not dry_run:
+            write_updates(engine, updates)
+            checkpoint["last_id"] = rows[-1].id
+            checkpoint["processed"] += len(rows)
+            checkpoint["updated"] += len(updates)
+            if checkpoint_path:
+                save_checkpoint(checkpoint_path, checkpoint)
+        progress.add(len(rows), len(updates))
+    progress.report(end="\n")
+    return {"mode": mode, "dry_run": dry_run, "total": total, **progress.as_dict()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-price or re-score stored DamageAnalysis rows")
+    parser.add_argument("mode", choices=MODES)
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="rows per read and write transaction (default: 2000 reprice, 256 rescore)")
+    parser.add_argument("--batch-size", type=int, default=config.BATCH_MAX_SIZE * 2, help="images per forward pass")
+    parser.add_argument("--workers", type=int, default=config.CPU_WORKERS, help="decode threads for rescore")
+    parser.add_argument("--no-localize", action="store_true", help="rescore without re-localizing damage")
+    parser.add_argument("--checkpoint", default=None, help="default: backfill-<mode>.checkpoint")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint")
+    parser.add_argument("--dry-run", action="store_true", help="count what would change without writing")
+    args = parser.parse_args()
+
+    from app.db.database import engine
+
+    chunk_size = args.chunk_size or (2000 if args.mode == "reprice" else 256)
+    rescorer = None
+    if args.mode == "rescore":
+        from app.services.ml import get_runtime
+
+        get_runtime().load()
+        rescorer = Rescorer(args.batch_size, args.workers, localize=not args.no_localize)
+    try:
+        summary = backfill(
+            engine,
+            args.mode,
+            rescorer or reprice_chunk,
+            chunk_size=chunk_size,
+            checkpoint_path=args.checkpoint or f"backfill-{args.mode}.checkpoint",
+            resume=args.resume,
+            dry_run=args.dry_run,
+        )
+    finally:
+        if rescorer is not None:
+            rescorer.close()
+    if rescorer is not None:
+        summary["unreadable_images"] = rescorer.unreadable
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
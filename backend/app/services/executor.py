@@ -0,0 +1,31 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from app import config
+
+# File writes, Pillow file handles and synchronous SQLModel sessions
+io_pool = ThreadPoolExecutor(max_workers=config.IO_WORKERS, thread_name_prefix="io")
+
+# Decoding and model.predict; both NumPy/Pillow and TensorFlow release the GIL
+# in their hot loops, so threads scale with cores without copying the model
+# into every worker the way a process pool would.
+cpu_pool = ThreadPoolExecutor(max_workers=config.CPU_WORKERS, thread_name_prefix="cpu")
+
+
+async def run_io(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking I/O or DB call on the bounded I/O pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_pool, functools.partial(fn, *args, **kwargs))
+
+
+async def run_cpu(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run CPU-bound decoding or inference on the CPU pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_pool, functools.partial(fn, *args, **kwargs))
+
+
+def shutdown():
+    io_pool.shutdown(wait=False)
+    cpu_pool.shutdown(wait=False)
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.db.models import DamageAnalysis
+from app.services.executor import run_io
+from app.services.metrics import STAGE_SECONDS, record_analysis
+
+QUEUED = "Queued"
+RUNNING = "Running"
+COMPLETED = "Completed"
+FAILED = "Failed"
+
+
+def failure_reason(error: Exception) -> str:
+    """Why a job failed, also for exceptions whose str() is empty."""
+    if isinstance(error, HTTPException):
+        return f"{error.status_code}: {error.detail}"
+    return repr(error)
+
+
+class JobWorkerPool:
+    """Drains Queued DamageAnalysis rows in the background.
+
+    The ``damageanalysis`` table itself is the persistent queue: uploads
+    insert a row with status Queued and workers move it through Running to
+    Completed or Failed. A job is claimed with a conditional UPDATE, so
+    several workers (or processes) never run the same row twice.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        analyze_fn: Callable[[str], Awaitable[Dict]],
+        num_workers: int = 2,
+        poll_interval: float = 1.0,
+    ):
+        self.engine = engine
+        self.analyze_fn = analyze_fn
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self.completed = 0
+        self.failed = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self):
+        # Rows left Running by a crashed process are picked up again. With
+        # several API processes sharing the DB, only one should run workers.
+        if self._workers:
+            return
+        requeued = await run_io(self._requeue_interrupted)
+        if requeued:
+            logging.info(f"Requeued {requeued} analysis jobs interrupted by a restart")
+        self._wakeup = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self._workers = [loop.create_task(self._run()) for _ in range(self.num_workers)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def notify(self):
+        """Wake idle workers after a job was enqueued."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def queue_depth(self) -> int:
+        with Session(self.engine) as session:
+            return session.exec(
+                select(func.count()).select_from(DamageAnalysis).where(DamageAnalysis.status == QUEUED)
+            ).one()
+
+    async def _run(self):
+        while True:
+            job_id = None
+            try:
+                job_id = await run_io(self._claim_next)
+                if job_id is None:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._process(job_id)
+            except Exception as e:
+                # One bad job or a locked database must not take the worker down with it
+                if job_id is None:
+                    logging.exception(f"Claiming an analysis job failed: {e!r}")
+                    await asyncio.sleep(self.poll_interval)
+                else:
+                    await self._fail(job_id, e)
+
+    async def _process(self, job_id: int):
+        image_uri = await run_io(self._image_uri, job_id)
+        result = await self.analyze_fn(image_uri)
+        await run_io(self._finish, job_id, COMPLETED, result)
+        self.completed += 1
+        record_analysis(result)
+
+    async def _fail(self, job_id: int, error: Exception):
+        reason = failure_reason(error)
+        logging.error(f"Analysis job {job_id} failed: {reason}", exc_info=error)
+        self.failed += 1
+        try:
+            await run_io(self._finish, job_id, FAILED, None, reason)
+        except Exception:
+            # Left Running; _requeue_interrupted retries it on the next start
+            logging.exception(f"Could not mark analysis job {job_id} as {FAILED}")
+
+    def _claim_next(self) -> Optional[int]:
+        with Session(self.engine) as session:
+            while True:
+                job_id = session.exec(
+                    select(DamageAnalysis.id)
+                    .where(DamageAnalysis.status == QUEUED)
+                    .order_by(DamageAnalysis.id)
+                    .limit(1)
+                ).first()
+                if job_id is None:
+                    return None
+                claimed = session.execute(
+                    update(DamageAnalysis)
+                    .where(DamageAnalysis.id == job_id, DamageAnalysis.status == QUEUED)
+                    .values(status=RUNNING)
+                )
+                session.commit()
+                # Lost the race to another worker: try the next queued row
+                if claimed.rowcount == 1:
+                    return job_id
+
+    def _image_uri(self, job_id: int) -> str:
+        with Session(self.engine) as session:
+            damage_analysis = session.get(DamageAnalysis, job_id)
+            if damage_analysis is None:
+                raise LookupError(f"Analysis {job_id} no longer exists")
+            return damage_analysis.image_uri
+
+    @STAGE_SECONDS.time(stage="db_commit")
+    def _finish(self, job_id: int, status: str, result: Optional[Dict], error: Optional[str] = None):
+        with Session(self.engine) as session:
+            damage_analysis = session.get(DamageAnalysis, job_id)
+            if damage_analysis is None:
+                return
+            damage_analysis.status = status
+            damage_analysis.error = error
+            if result is not None:
+                damage_analysis.damage_detected = result["damage_detected"]
+                damage_analysis.damage_types = result["damage_types"]
+                damage_analysis.severity = result["severity"]
+                damage_analysis.cost_estimation = result["cost_estimation"]
+                damage_analysis.confidence = result["confidence"]
+            session.add(damage_analysis)
+            session.commit()
+
+    def _requeue_interrupted(self) -> int:
+        with Session(self.engine) as session:
+            result = session.execute(
+                update(DamageAnalysis)
+                .where(DamageAnalysis.status == RUNNING)
+                .values(status=QUEUED)
+            )
+            session.commit()
+            return result.rowcount
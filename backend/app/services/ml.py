@@ -0,0 +1,50 @@
+import sys
+from pathlib import Path
+
+# Shared inference code lives next to the training scripts in <repo>/model
+MODEL_SRC_DIR = Path(__file__).resolve().parents[3] / "model"
+if MODEL_SRC_DIR.is_dir() and str(MODEL_SRC_DIR) not in sys.path:
+    sys.path.append(str(MODEL_SRC_DIR))
+
+from model_registry import ModelRegistry, registry  # noqa: E402
+from inference_runtime import load_runtime  # noqa: E402
+from image_pipeline import (  # noqa: E402
+    PREPROCESSING_VERSION, TARGET_SIZE, Preprocessor, decode_into, normalize_inplace, preprocessor,
+)
+from cascade import PRESCREEN_SIZE, CascadeStats, escalation_mask  # noqa: E402
+from localization import Localizer, upright_size  # noqa: E402
+from gradcam import heatmap_regions, load_cam_runtime, save_overlay  # noqa: E402
+
+from app import config  # noqa: E402
+
+
+def active_model_path() -> str:
+    """Model file served by the configured inference backend."""
+    if config.INFERENCE_BACKEND == "tflite":
+        return config.TFLITE_MODEL_PATH
+    return config.MODEL_PATH
+
+
+def get_runtime():
+    """Configured inference runtime (Keras or TFLite), shared process-wide."""
+    return load_runtime(active_model_path(), config.INFERENCE_BACKEND)
+
+
+def cam_active() -> bool:
+    """Whether damage is localized from Grad-CAM heatmaps rather than tiles."""
+    return (
+        config.LOCALIZATION_ENABLED and config.LOCALIZATION_MODE == "cam" and config.INFERENCE_BACKEND == "keras"
+    )
+
+
+def get_cam_runtime():
+    """Keras runtime that returns a Grad-CAM heatmap with every prediction."""
+    return load_cam_runtime(config.MODEL_PATH)
+
+
+prescreen_preprocessor = Preprocessor(PRESCREEN_SIZE)
+
+
+def get_prescreen_runtime():
+    """Runtime of the cascade's low-resolution pre-screen model."""
+    return load_runtime(config.PRESCREEN_MODEL_PATH, config.PRESCREEN_BACKEND)
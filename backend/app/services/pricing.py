@@ -0,0 +1,153 @@
+import csv
+import logging
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app import config
+from app.services.ml import ModelRegistry
+
+WILDCARD = "*"
+COMPONENTS = ("labor", "parts", "paint")
+BREAKDOWN = (
+    ("Labor", "Labor", "Repair work"),
+    ("Parts", "Parts", "Replacement parts"),
+    ("Paint", "Paint", "Repainting"),
+)
+
+# Severity labels used outside the rate table (legacy service, frontend) -> table keys
+SEVERITY_ALIASES = {"Minor": "Low", "Moderate": "Medium", "Severe": "High"}
+
+Rate = Tuple[str, str, str, float, float, float]
+
+
+class RateTable:
+    """Labor, parts and paint rates per damage type x location x severity.
+
+    Rows are compiled into one dense ``(types, locations, severities, 3)``
+    array, with every wildcard already resolved, so pricing a batch of
+    detections is a vectorized name lookup plus a single fancy index.
+    Names missing from the table fall back to its ``*`` entries; a
+    detection that only the ``*,*,*`` row covers is logged as a warning.
+    """
+
+    def __init__(self, rates: Sequence[Rate], version: str = "inline"):
+        self.version = version
+        axes = [sorted({rate[axis] for rate in rates} | {WILDCARD}) for axis in range(3)]
+        self.types, self.locations, self.severities = (np.array(names) for names in axes)
+
+        self.rates = np.full((len(self.types), len(self.locations), len(self.severities), 3), np.nan)
+        # Cells whose rate came from the catch-all "*,*,*" row
+        self.catch_all = np.zeros(self.rates.shape[:3], dtype=bool)
+        self._warned = set()
+        # Broad rows first so more specific ones overwrite them; the sort is stable for ties
+        for rate in sorted(rates, key=lambda rate: sum(name != WILDCARD for name in rate[:3])):
+            index = tuple(
+                slice(None) if name == WILDCARD else int(np.searchsorted(names, name))
+                for name, names in zip(rate[:3], (self.types, self.locations, self.severities))
+            )
+            self.rates[index] = rate[3:]
+            self.catch_all[index] = all(name == WILDCARD for name in rate[:3])
+        if np.isnan(self.rates).any():
+            raise ValueError("Rate table does not cover every combination; add a '*,*,*' row")
+
+    @classmethod
+    def from_csv(cls, path: str) -> "RateTable":
+        """Load a damage_type,location,severity,labor,parts,paint CSV; # lines are comments."""
+        with open(path, newline="") as f:
+            lines = [line for line in f if line.strip() and not line.lstrip().startswith("#")]
+        rates = [
+            (row["damage_type"].strip(), row["location"].strip(), row["severity"].strip(),
+             *(float(row[component]) for component in COMPONENTS))
+            for row in csv.DictReader(lines)
+        ]
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return cls(rates, version=f"{stem}-{os.stat(path).st_mtime_ns}")
+
+    @staticmethod
+    def _lookup(names: np.ndarray, values: Sequence[str]) -> np.ndarray:
+        values = np.asarray(values, dtype=str)
+        positions = np.searchsorted(names, values).clip(max=len(names) - 1)
+        return np.where(names[positions] == values, positions, int(np.searchsorted(names, WILDCARD)))
+
+    def price(self, types: Sequence[str], locations: Sequence[str], severities: Sequence[str]) -> np.ndarray:
+        """(N, 3) labor, parts and paint cost for N detections."""
+        if len(types) == 0:
+            return np.zeros((0, 3))
+        severities = [SEVERITY_ALIASES.get(severity, severity) for severity in severities]
+        index = (
+            self._lookup(self.types, types),
+            self._lookup(self.locations, locations),
+            self._lookup(self.severities, severities),
+        )
+        for i in np.flatnonzero(self.catch_all[index]):
+            self._warn_catch_all(types[i], locations[i], severities[i])
+        return self.rates[index]
+
+    def _warn_catch_all(self, damage_type: str, location: str, severity: str):
+        # Once per combination and table, so a missing row can't flood the log
+        key = (damage_type, location, severity)
+        if key not in self._warned:
+            self._warned.add(key)
+            logging.warning(f"No rate row for {key} in rate table {self.version}; priced with the '*,*,*' row")
+
+    def estimate_many(self, damage_types: Sequence[List[Dict]]) -> List[Dict]:
+        """cost_estimation payloads for several analyses, priced in one vectorized call.
+
+        An analysis costs the sum of its detections. Localization has already
+        merged overlapping boxes (NMS, or connected components of a heatmap),
+        so each detection left is a separate damaged area.
+        """
+        owners = np.repeat(np.arange(len(damage_types)), [len(items) for items in damage_types])
+        items = [item for items in damage_types for item in items]
+        costs = self.price(
+            [item.get("type", WILDCARD) for item in items],
+            [item.get("location", WILDCARD) for item in items],
+            [item.get("severity", WILDCARD) for item in items],
+        )
+        totals = np.zeros((len(damage_types), 3))
+        np.add.at(totals, owners, costs)
+        return [cost_estimation(row) for row in totals.round(2).tolist()]
+
+    def estimate(self, damage_types: List[Dict]) -> Dict:
+        return self.estimate_many([damage_types])[0]
+
+
+def cost_estimation(components: Sequence[float]) -> Dict:
+    """Payload for summed (labor, parts, paint) costs, keys in snake_case."""
+    labor, parts, paint = components
+    return {
+        "total_cost": round(labor + parts + paint, 2),
+        "labor_cost": labor,
+        "parts_cost": parts,
+        "paint_cost": paint,
+        "breakdown": [
+            {"item": item, "category": category, "cost": cost, "description": description}
+            for (item, category, description), cost in zip(BREAKDOWN, components)
+            if cost > 0
+        ],
+    }
+
+
+# Same mtime-checked hot reload as the model files
+rate_tables = ModelRegistry(loader=RateTable.from_csv)
+_last_good: Optional[RateTable] = None
+
+
+def get_rate_table() -> RateTable:
+    """Current rate table, reloaded when RATE_TABLE_PATH changes on disk.
+
+    A broken edit keeps the last table that loaded, so pricing never stops
+    because of a typo in the rate file.
+    """
+    global _last_good
+    try:
+        table = rate_tables.get(config.RATE_TABLE_PATH)
+    except Exception:
+        if _last_good is None:
+            raise
+        logging.warning(f"Keeping rate table {_last_good.version}; {config.RATE_TABLE_PATH} failed to load")
+        return _last_good
+    _last_good = table
+    return table
@@ -0,0 +1,113 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, func
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.db.models import AnalysisCache
+
+
+class ResultCache:
+    """Analysis payloads keyed by upload SHA-256 and model version.
+
+    An in-process LRU sits in front of the ``AnalysisCache`` table, so a
+    re-uploaded photo skips decoding and inference entirely. Methods are
+    blocking and meant to be called through the I/O pool.
+    """
+
+    # Persistent-tier eviction runs every N writes instead of on every put
+    EVICT_EVERY = 100
+
+    def __init__(self, engine: Engine, max_memory_entries: int = 1024, max_db_entries: int = 100_000):
+        self.engine = engine
+        self.max_memory_entries = max_memory_entries
+        self.max_db_entries = max_db_entries
+        self._lru: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.db_evictions = 0
+
+    @staticmethod
+    def make_key(sha256: str, model_version: str) -> str:
+        return f"{model_version}:{sha256}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            payload = self._lru.get(key)
+            if payload is not None:
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                return payload
+
+        with Session(self.engine) as session:
+            entry = session.get(AnalysisCache, key)
+            if entry is None:
+                with self._lock:
+                    self.misses += 1
+                return None
+            entry.last_used_at = datetime.utcnow()
+            payload = entry.payload
+            session.add(entry)
+            session.commit()
+
+        with self._lock:
+            self.db_hits += 1
+            self._remember(key, payload)
+        return payload
+
+    def put(self, key: str, payload: Dict[str, Any]):
+        with self._lock:
+            self._remember(key, payload)
+            self._puts += 1
+            evict = self._puts % self.EVICT_EVERY == 0
+
+        with Session(self.engine) as session:
+            session.merge(AnalysisCache(key=key, payload=payload))
+            session.commit()
+            if evict:
+                self._evict_persistent(session)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.db_hits
+            lookups = hits + self.misses
+            return {
+                "memory_entries": len(self._lru),
+                "max_memory_entries": self.max_memory_entries,
+                "max_db_entries": self.max_db_entries,
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+                "memory_evictions": self.memory_evictions,
+                "db_evictions": self.db_evictions,
+            }
+
+    def _remember(self, key: str, payload: Dict[str, Any]):
+        self._lru[key] = payload
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_memory_entries:
+            self._lru.popitem(last=False)
+            self.memory_evictions += 1
+
+    def _evict_persistent(self, session: Session):
+        count = session.exec(select(func.count()).select_from(AnalysisCache)).one()
+        excess = count - self.max_db_entries
+        if excess <= 0:
+            return
+        oldest = (
+            select(AnalysisCache.key)
+            .order_by(AnalysisCache.last_used_at)
+            .limit(excess)
+        )
+        session.exec(delete(AnalysisCache).where(AnalysisCache.key.in_(oldest)))
+        session.commit()
+        with self._lock:
+            self.db_evictions += excess
@@ -0,0 +1,182 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from fastapi import HTTPException, UploadFile
+
+from app import config
+from app.services.executor import run_io
+from app.services.metrics import STAGE_SECONDS
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tiff", ".webp")
+
+
+class StoredUpload(NamedTuple):
+    path: Path
+    sha256: str
+    size: int
+
+
+def upload_path(user_id, filename: Optional[str]) -> Path:
+    """Destination for a user's upload; the client filename is reduced to its basename.
+
+    A random suffix keeps same-named files uploaded in the same second (e.g.
+    several phone photos called image.jpg in one batch) from overwriting
+    each other.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    name = Path(filename or "upload").name
+    return Path(config.UPLOADS_DIR) / str(user_id) / f"{timestamp}_{uuid.uuid4().hex[:12]}_{name}"
+
+
+def _too_large(max_bytes: int = config.UPLOAD_MAX_BYTES) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Upload exceeds the {max_bytes} byte limit",
+    )
+
+
+def _spooled_size(file: UploadFile) -> Optional[int]:
+    """Size of the already-received body, if the underlying file is seekable."""
+    try:
+        position = file.file.tell()
+        file.file.seek(0, os.SEEK_END)
+        size = file.file.tell()
+        file.file.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _write_chunk(out, hasher, chunk: bytes):
+    hasher.update(chunk)
+    out.write(chunk)
+
+
+def _cleanup(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+@STAGE_SECONDS.time(stage="upload_write")
+async def save_upload(
+    file: UploadFile,
+    dest: Path,
+    max_bytes: int = config.UPLOAD_MAX_BYTES,
+    chunk_size: int = config.UPLOAD_CHUNK_SIZE,
+) -> StoredUpload:
+    """Stream an upload to ``dest`` in fixed-size chunks, hashing as it copies.
+
+    The body is written to a temp file in the destination directory and
+    renamed into place, so a partially written image is never visible.
+    Memory held per request is bounded by ``chunk_size``.
+    """
+    size = _spooled_size(file)
+    if size is not None and size > max_bytes:
+        raise _too_large(max_bytes)
+
+    await run_io(dest.parent.mkdir, parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dest.parent, prefix=".upload-", suffix=".part")
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        # mkstemp creates 0600 files; keep the permissions a plain open() would give
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                await run_io(_write_chunk, out, hasher, chunk)
+        await run_io(os.replace, tmp_path, dest)
+    except BaseException:
+        _cleanup(tmp_path)
+        raise
+
+    return StoredUpload(path=dest, sha256=hasher.hexdigest(), size=size)
+
+
+def file_sha256(path, chunk_size: int = config.UPLOAD_CHUNK_SIZE) -> str:
+    """Content hash of a stored upload, the same one save_upload computes while writing it."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def is_zip_upload(file: UploadFile) -> bool:
+    return (file.filename or "").lower().endswith(".zip") or file.content_type in (
+        "application/zip",
+        "application/x-zip-compressed",
+    )
+
+
+class _HashingWriter:
+    def __init__(self, out, max_bytes: int):
+        self.out = out
+        self.max_bytes = max_bytes
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise _too_large(self.max_bytes)
+        self.hasher.update(chunk)
+        self.out.write(chunk)
+
+
+def extract_zip_images(
+    zip_path: Path,
+    dest_dir: Path,
+    max_files: int,
+    max_bytes: int = config.UPLOAD_MAX_BYTES,
+    chunk_size: int = config.UPLOAD_CHUNK_SIZE,
+) -> List[StoredUpload]:
+    """Stream the image members of an uploaded archive into ``dest_dir``.
+
+    Member names are flattened to their basename and non-image entries are
+    skipped. Every member is size-checked while it is copied, so a zip bomb
+    can't exceed ``max_bytes`` per image or ``max_files`` images.
+    """
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    # Unique per archive, so two zips in one batch can't overwrite each other's members
+    prefix = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:12]}"
+    stored = []
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            members = [
+                info for info in archive.infolist()
+                if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS)
+            ]
+            if len(members) > max_files:
+                raise HTTPException(status_code=413, detail=f"Archive contains more than {max_files} images")
+            for index, info in enumerate(members):
+                dest = dest_dir / f"{prefix}_{index:03d}_{Path(info.filename).name}"
+                fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix=".upload-", suffix=".part")
+                try:
+                    os.fchmod(fd, 0o644)
+                    with os.fdopen(fd, "wb") as out, archive.open(info) as member:
+                        writer = _HashingWriter(out, max_bytes)
+                        shutil.copyfileobj(member, writer, chunk_size)
+                    os.replace(tmp_path, dest)
+                except BaseException:
+                    _cleanup(tmp_path)
+                    raise
+                stored.append(StoredUpload(path=dest, sha256=writer.hasher.hexdigest(), size=writer.size))
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Uploaded archive is not a valid zip file")
+    return stored
@@ -0,0 +1,110 @@
+from typing import Callable, Iterator, List, NamedTuple, Tuple
+
+import numpy as np
+
+from app import config
+from app.services.ml import preprocessor
+
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v")
+SAMPLING_MODES = ("interval", "scene")
+
+# Side of the grayscale thumbnail compared for scene changes
+SCENE_THUMBNAIL_SIZE = 32
+
+
+class FrameScore(NamedTuple):
+    timestamp: float
+    confidence: float
+
+
+def is_video_filename(filename: str) -> bool:
+    return (filename or "").lower().endswith(VIDEO_EXTENSIONS)
+
+
+def iter_sampled_frames(
+    path: str,
+    mode: str = "interval",
+    interval_s: float = config.VIDEO_SAMPLE_INTERVAL_S,
+    scene_threshold: float = config.VIDEO_SCENE_THRESHOLD,
+    max_samples: int = config.VIDEO_MAX_SAMPLES,
+) -> Iterator[Tuple[float, np.ndarray]]:
+    """Yield (timestamp, BGR frame) for the sampled frames of a video file.
+
+    ``interval`` mode yields one frame every ``interval_s`` seconds. ``scene``
+    mode checks a frame every ``interval_s`` seconds and yields it when its
+    thumbnail differs from the last sampled one by more than
+    ``scene_threshold`` (mean absolute difference on a 0-255 scale).
+    Frames in between are only grabbed, never converted, and just one frame
+    is held at a time.
+    """
+    import cv2
+
+    capture = cv2.VideoCapture(str(path))
+    if not capture.isOpened():
+        raise ValueError("Could not open the uploaded video")
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        if not fps or fps <= 0 or fps > 1000:
+            fps = 30.0
+        step = max(1, round(interval_s * fps))
+
+        index = 0
+        sampled = 0
+        reference = None
+        while sampled < max_samples:
+            if index % step:
+                if not capture.grab():
+                    break
+                index += 1
+                continue
+
+            ok, frame = capture.read()
+            if not ok:
+                break
+            timestamp = index / fps
+            index += 1
+
+            if mode == "scene":
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                thumbnail = cv2.resize(
+                    gray, (SCENE_THUMBNAIL_SIZE, SCENE_THUMBNAIL_SIZE), interpolation=cv2.INTER_AREA
+                ).astype(np.int16)
+                if reference is not None and np.abs(thumbnail - reference).mean() < scene_threshold:
+                    continue
+                reference = thumbnail
+
+            sampled += 1
+            yield timestamp, frame
+    finally:
+        capture.release()
+
+
+def score_video(
+    path: str,
+    predict_fn: Callable[[np.ndarray], np.ndarray],
+    batch_size: int = config.VIDEO_BATCH_SIZE,
+    **sampling,
+) -> List[FrameScore]:
+    """Damage probability of every sampled frame, scored ``batch_size`` frames per forward pass.
+
+    Sampled frames are preprocessed straight into one reused batch buffer,
+    so memory stays flat however long the video is.
+    """
+    batch = preprocessor.allocate(batch_size)
+    timestamps = []
+    scores = []
+
+    def flush():
+        predictions = predict_fn(batch[:len(timestamps)])
+        scores.extend(FrameScore(t, float(p[0])) for t, p in zip(timestamps, predictions))
+        timestamps.clear()
+
+    for timestamp, frame in iter_sampled_frames(path, **sampling):
+        preprocessor.preprocess_frames([frame], out=batch[len(timestamps):])
+        timestamps.append(round(timestamp, 3))
+        if len(timestamps) == batch_size:
+            flush()
+    if timestamps:
+        flush()
+    return scores
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app import config
+from app.services.executor import run_cpu
+from app.services import metrics
+from app.services.ml import (
+    PRESCREEN_SIZE, active_model_path, cam_active, get_cam_runtime, get_prescreen_runtime, get_runtime, registry,
+)
+
+
+class WarmupState:
+    """Tracks whether the inference stack has been loaded and exercised."""
+
+    def __init__(self):
+        self.status = "pending"  # pending -> warming -> ready | mock, or pending -> skipped | mock
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        # Mock mode serves requests too, it just has no model to warm. With
+        # warm-up skipped the first analysis request loads the model instead.
+        if self.status == "pending":
+            return registry.is_loaded(active_model_path())
+        return self.status in ("ready", "mock", "skipped")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "status": self.status,
+            "model_loaded": registry.is_loaded(active_model_path()),
+            "backend": config.INFERENCE_BACKEND,
+            "model_path": active_model_path(),
+            "model_load_seconds": registry.load_time(active_model_path()),
+            "warmup_seconds": self.seconds,
+            "error": self.error,
+        }
+
+
+state = WarmupState()
+
+
+MODEL_LOAD_SECONDS = metrics.registry.register(metrics.Gauge(
+    "motoscan_model_load_seconds",
+    "Seconds the served model took to load, once it has been loaded.",
+    function=lambda: registry.load_time(active_model_path()),
+))
+
+
+def _warm_model():
+    # Imports TensorFlow, deserializes the model and builds the predict graph
+    get_runtime().predict(np.zeros((1, 224, 224, 3), dtype=np.float32))
+    if cam_active():
+        # Splits the model and traces the backbone and head once
+        get_cam_runtime().predict_with_heatmaps(np.zeros((1, 224, 224, 3), dtype=np.float32))
+    if config.CASCADE_ENABLED:
+        width, height = PRESCREEN_SIZE
+        try:
+            get_prescreen_runtime().predict(np.zeros((1, height, width, 3), dtype=np.float32))
+        except Exception as e:
+            # The cascade is an optimization; without it every photo goes to the full model
+            logging.warning(f"Pre-screen warm-up failed, cascade disabled: {e}")
+
+
+async def warm_up():
+    state.status = "warming"
+    start = time.perf_counter()
+    try:
+        await run_cpu(_warm_model)
+    except Exception as e:
+        logging.warning(f"Model warm-up failed, running in mock mode: {e}")
+        state.status = "mock"
+        state.error = str(e)
+    else:
+        state.status = "ready"
+    state.seconds = time.perf_counter() - start
+
+
+def _mark_mock_if_no_model() -> bool:
+    path = active_model_path()
+    if os.path.exists(path):
+        return False
+    state.status = "mock"
+    state.error = f"Model file {path} not found"
+    return True
+
+
+def start_background_warmup():
+    """Schedule warm_up without delaying application startup."""
+    if _mark_mock_if_no_model():
+        return
+    if state._task is None:
+        state._task = asyncio.get_running_loop().create_task(warm_up())
+
+
+def skip_warmup():
+    """Warm-up disabled: ready at once, the first analysis request loads the model."""
+    if not _mark_mock_if_no_model():
+        state.status = "skipped"
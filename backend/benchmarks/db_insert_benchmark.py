@@ -0,0 +1,94 @@
+"""
+DamageAnalysis insert throughput: default SQLite engine with one commit per
+analysis (the old code path) versus the tuned engine (WAL pragmas, pooled
+connections) with write-behind batching.
+
+Both run the same number of concurrent inserting tasks against a fresh
+database file::
+
+    python benchmarks/db_insert_benchmark.py --rows 2000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlmodel import Session, SQLModel, create_engine  # noqa: E402
+
+from app.db.database import make_async_engine, make_engine  # noqa: E402
+from app.db.models import DamageAnalysis  # noqa: E402
+from app.db.write_batcher import WriteBehindBatcher  # noqa: E402
+from app.services.executor import run_io  # noqa: E402
+
+
+def make_row(i: int) -> DamageAnalysis:
+    return DamageAnalysis(
+        user_id=f"user-{i % 50}",
+        image_uri=f"uploads/bench/{i}.jpg",
+        damage_detected=True,
+        damage_types=[{"type": "Scratch", "location": "Front bumper", "severity": "Medium",
+                       "coordinates": {"x": 100, "y": 150, "width": 50, "height": 30}}],
+        severity="Medium",
+        cost_estimation={"total_cost": 800.0, "labor_cost": 300.0, "parts_cost": 400.0,
+                         "paint_cost": 100.0, "breakdown": []},
+        status="Completed",
+        confidence=0.85,
+    )
+
+
+def commit_one(engine, row: DamageAnalysis):
+    with Session(engine) as session:
+        session.add(row)
+        session.commit()
+        session.refresh(row)
+
+
+async def run(insert, rows: int, concurrency: int) -> float:
+    counter = iter(range(rows))
+
+    async def worker():
+        for i in counter:
+            await insert(make_row(i))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return rows / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    report = {"rows": args.rows, "concurrency": args.concurrency}
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = create_engine(f"sqlite:///{tmp}/baseline.db", connect_args={"check_same_thread": False})
+        SQLModel.metadata.create_all(baseline)
+        report["baseline_inserts_per_sec"] = await run(
+            lambda row: run_io(commit_one, baseline, row), args.rows, args.concurrency
+        )
+        baseline.dispose()
+
+        tuned = make_engine(f"sqlite:///{tmp}/tuned.db")
+        SQLModel.metadata.create_all(tuned)
+        tuned.dispose()
+        tuned_async = make_async_engine(f"sqlite+aiosqlite:///{tmp}/tuned.db")
+        batcher = WriteBehindBatcher(tuned_async)
+        report["tuned_batched_inserts_per_sec"] = await run(batcher.add, args.rows, args.concurrency)
+        await batcher.stop()
+        report["avg_rows_per_transaction"] = batcher.stats()["avg_rows_per_transaction"]
+        await tuned_async.dispose()
+
+    report["speedup"] = report["tuned_batched_inserts_per_sec"] / report["baseline_inserts_per_sec"]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,292 @@
+"""
+Reproducible load test of the API with a deterministic stub model.
+
+The app is served in-process by uvicorn against a throwaway database and
+uploads directory. The model is replaced by a stub that sleeps for a fixed
+time per forward pass (plus per image), so results measure the serving
+stack rather than TensorFlow. Each endpoint is then driven at every
+requested concurrency level and the results are printed (and optionally
+written) as JSON, ready to diff between commits::
+
+    python benchmarks/load_test.py --requests 500 --concurrency 1 8 32 \\
+        --model-latency-ms 40 --output load_test.json
+
+Endpoints: POST /api/analyze, GET /api/{user_id}/history and
+GET /api/analysis/{id}.
+"""
+
+import argparse
+import http.client
+import io
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+ENDPOINTS = ("analyze", "history", "analysis")
+
+
+class StubRuntime:
+    """Stands in for the inference runtime: fixed latency, deterministic output.
+
+    P(damage) is derived from the mean pixel value, so the same image always
+    gets the same result.
+    """
+
+    def __init__(self, batch_latency_ms: float, image_latency_ms: float = 0.0):
+        self.batch_latency = batch_latency_ms / 1000
+        self.image_latency = image_latency_ms / 1000
+        self.batches = 0
+
+    def load(self):
+        return self
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        time.sleep(self.batch_latency + self.image_latency * len(batch))
+        self.batches += 1
+        damage = (batch.reshape(len(batch), -1).mean(axis=1) + 1) / 2
+        return np.stack([damage, 1 - damage], axis=1).astype(np.float32)
+
+
+def synthetic_jpegs(count: int, size=(640, 480), seed: int = 0):
+    """``count`` distinct JPEG payloads, so uploads don't hit the result cache unless repeated."""
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        base = rng.integers(0, 256, size=3)
+        pixels = np.clip(base + rng.normal(0, 25, size=(size[1], size[0], 3)), 0, 255).astype(np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(pixels).save(buffer, format="JPEG", quality=85)
+        images.append(buffer.getvalue())
+    return images
+
+
+def multipart(field: str, filename: str, payload: bytes, content_type: str = "image/jpeg"):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    # Signal handlers can only be installed from the main thread
+    server.install_signal_handlers = lambda: None
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("API server failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+
+class Client:
+    """One keep-alive HTTP connection per load-generating thread."""
+
+    def __init__(self, port: int):
+        self.port = port
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body: bytes = None, headers: dict = None):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=120)
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, response.read()
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            self._local.connection = None
+            raise
+
+
+def run_phase(client: Client, make_request, requests: int, concurrency: int):
+    """Issue ``requests`` calls from ``concurrency`` threads; latency and status per call."""
+    latencies = np.zeros(requests)
+    statuses = [0] * requests
+    counter = iter(range(requests))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            method, path, body, headers = make_request(i)
+            start = time.perf_counter()
+            try:
+                statuses[i], _ = client.request(method, path, body, headers)
+            except Exception:
+                statuses[i] = -1
+            latencies[i] = time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    elapsed = time.perf_counter() - started
+
+    latencies_ms = latencies * 1000
+    errors = sum(1 for status in statuses if not 200 <= status < 300)
+    status_counts = {}
+    for status in statuses:
+        key = "connection_error" if status == -1 else str(status)
+        status_counts[key] = status_counts.get(key, 0) + 1
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2),
+        "errors": errors,
+        "error_rate": round(errors / requests, 4),
+        "status_counts": status_counts,
+        "latency_ms": {
+            "mean": round(float(latencies_ms.mean()), 2),
+            "p50": round(float(np.percentile(latencies_ms, 50)), 2),
+            "p90": round(float(np.percentile(latencies_ms, 90)), 2),
+            "p95": round(float(np.percentile(latencies_ms, 95)), 2),
+            "p99": round(float(np.percentile(latencies_ms, 99)), 2),
+            "max": round(float(latencies_ms.max()), 2),
+        },
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process API load test with a stub model")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--model-latency-ms", type=float, default=30.0, help="stub latency per forward pass")
+    parser.add_argument("--model-latency-per-image-ms", type=float, default=2.0)
+    parser.add_argument("--users", type=int, default=20, help="distinct user ids to spread uploads over")
+    parser.add_argument("--image-pool", type=int, default=None,
+                        help="distinct JPEGs to upload (default: one per request, so no cache hits)")
+    parser.add_argument("--output", help="also write the JSON report here")
+    parser.add_argument("--keep-workdir", action="store_true", help="keep the temporary database and uploads")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="motoscan-load-")
+    # Must be set before the app modules read their config
+    os.environ.update({
+        "DATABASE_PATH": os.path.join(workdir, "load_test.db"),
+        "UPLOADS_DIR": os.path.join(workdir, "uploads"),
+        "WARMUP_ON_STARTUP": "0",
+        "MODEL_VERSION": "load-test-stub",
+    })
+
+    import main as api
+    from app.api.v1.endpoints import damage_detection
+
+    stub = StubRuntime(args.model_latency_ms, args.model_latency_per_image_ms)
+    damage_detection.get_runtime = lambda: stub
+
+    analyze_requests = args.requests * len(args.concurrency)
+    images = synthetic_jpegs(args.image_pool or analyze_requests)
+    print(f"Generated {len(images)} synthetic JPEGs in {workdir}", file=sys.stderr)
+
+    port = free_port()
+    server, thread = start_server(api.app, port)
+    client = Client(port)
+    analysis_ids = []
+    upload_index = iter(range(sys.maxsize))
+
+    def analyze_request(i):
+        n = next(upload_index)
+        body, content_type = multipart("file", f"load_{n}.jpg", images[n % len(images)])
+        return "POST", f"/api/analyze?user_id=user-{n % args.users}", body, {"Content-Type": content_type}
+
+    def history_request(i):
+        return "GET", f"/api/user-{i % args.users}/history?limit=50", None, None
+
+    def analysis_request(i):
+        return "GET", f"/api/analysis/{analysis_ids[i % len(analysis_ids)]}", None, None
+
+    makers = {"analyze": analyze_request, "history": history_request, "analysis": analysis_request}
+    routes = {
+        "analyze": "POST /api/analyze",
+        "history": "GET /api/{user_id}/history",
+        "analysis": "GET /api/analysis/{id}",
+    }
+
+    results = []
+    try:
+        # Reads need rows to read back, so make sure some analyses exist first
+        if "analyze" not in args.endpoints and any(e != "analyze" for e in args.endpoints):
+            run_phase(client, analyze_request, min(args.requests, 100), 8)
+        for endpoint in ("analyze", "history", "analysis"):
+            if endpoint not in args.endpoints:
+                continue
+            if endpoint == "analysis":
+                status, body = client.request("GET", "/api/user-0/history?limit=200")
+                analysis_ids = [item["id"] for item in json.loads(body)["items"]] or [1]
+            for concurrency in args.concurrency:
+                print(f"{routes[endpoint]} at concurrency {concurrency}", file=sys.stderr)
+                result = run_phase(client, makers[endpoint], args.requests, concurrency)
+                results.append({"endpoint": routes[endpoint], **result})
+        _, batching = client.request("GET", "/api/batching/stats")
+    finally:
+        server.should_exit = True
+        thread.join(timeout=30)
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "model_latency_ms": args.model_latency_ms,
+            "model_latency_per_image_ms": args.model_latency_per_image_ms,
+            "image_pool": len(images),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+        "batching": json.loads(batching),
+        "stub_forward_passes": stub.batches,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Startup benchmark: time to import the FastAPI app and the process RSS after import.
+
+Each measurement runs in a fresh interpreter. Pass git refs to compare the
+app as it was at those commits (exported with ``git archive``) against the
+working tree, e.g.::
+
+    python benchmarks/startup_benchmark.py --ref HEAD~5 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+REPO_DIR = BACKEND_DIR.parent
+
+# Runs inside the child interpreter with cwd set to the backend directory
+PROBE = r"""
+import json, sys, time
+sys.path.insert(0, ".")
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+
+def rss_kib():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+print(json.dumps({
+    "import_seconds": elapsed,
+    "rss_mib": rss_kib() / 1024,
+    "tensorflow_imported": "tensorflow" in sys.modules,
+}))
+"""
+
+
+def measure(backend_dir: Path, repeats: int) -> dict:
+    runs = []
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            cwd=backend_dir,
+            capture_output=True,
+            text=True,
+            env={**os.environ, "WARMUP_ON_STARTUP": "0"},
+        )
+        if result.returncode != 0:
+            return {"error": result.stderr.strip().splitlines()[-1] if result.stderr else "failed"}
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return {
+        "import_seconds_median": statistics.median(r["import_seconds"] for r in runs),
+        "import_seconds_min": min(r["import_seconds"] for r in runs),
+        "rss_mib_median": statistics.median(r["rss_mib"] for r in runs),
+        "tensorflow_imported": runs[0]["tensorflow_imported"],
+        "runs": len(runs),
+    }
+
+
+def export_ref(ref: str, dest: Path) -> Path:
+    archive = dest / "tree.tar"
+    subprocess.run(["git", "archive", "-o", str(archive), ref, "backend", "model"], cwd=REPO_DIR, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(dest)
+    return dest / "backend"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ref", action="append", default=[], help="git ref to measure in addition to the working tree")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {}
+    for ref in args.ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            report[ref] = measure(export_ref(ref, Path(tmp)), args.repeats)
+    report["working-tree"] = measure(BACKEND_DIR, args.repeats)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.db.database import create_db_and_tables
+from fastapi.responses import JSONResponse, Response
+from app import config
+from app.db.database import async_engine, create_db_and_tables
 from app.api.v1.endpoints import damage_detection # Assuming you have an __init__.py in endpoints
+from app.services import executor, metrics, warmup
 
 app = FastAPI()
 
@@ -14,13 +17,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency and in-flight count for /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Include your API routers
 app.include_router(damage_detection.router)
 
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     create_db_and_tables()
+    await damage_detection.job_pool.start()
+    # TensorFlow is only imported here (or on the first analysis), never at import time
+    if config.WARMUP_ON_STARTUP:
+        warmup.start_background_warmup()
+    else:
+        warmup.skip_warmup()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await damage_detection.job_pool.stop()
+    await damage_detection.batcher.stop()
+    await damage_detection.cam_batcher.stop()
+    await damage_detection.prescreen_batcher.stop()
+    await damage_detection.write_batcher.stop()
+    await async_engine.dispose()
+    executor.shutdown()
 
 @app.get("/")
 async def root():
-    return {"message": "Hello, World!"}
\ No newline at end of file
+    return {"message": "Hello, World!"}
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 503 until the model is loaded and warmed."""
+    return JSONResponse(
+        status_code=200 if warmup.state.ready else 503,
+        content=warmup.state.as_dict(),
+    )
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text-format metrics."""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
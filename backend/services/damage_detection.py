@@ -1,39 +1,38 @@
 # backend/services/damage_detection.py
 
-import tensorflow as tf
 import numpy as np
 from typing import Dict, Any
-import os
-from PIL import Image
-import logging
 
-# --- Build the correct, robust path to the model ---
-try:
-    SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
-    PROJECT_ROOT = os.path.dirname(os.path.dirname(SERVICE_DIR))
-    MODEL_PATH = os.path.join(PROJECT_ROOT, "model", "damage_detection.h5")
-    model = tf.keras.models.load_model(MODEL_PATH)
-    logging.info("✅ Successfully loaded ML model.")
-except Exception as e:
-    logging.error(f"Failed to load model from path: {MODEL_PATH}", exc_info=True)
-    model = None
+from app.services.ml import get_runtime, preprocessor
+from app.services.pricing import get_rate_table
+
+def get_model():
+    """Configured inference runtime (Keras or TFLite), or None if its model can't be loaded."""
+    runtime = get_runtime()
+    try:
+        runtime.load()
+    except Exception:
+        return None
+    return runtime
 
 def preprocess_image(image_path: str) -> np.ndarray:
     """Prepares an image for model prediction."""
-    img = Image.open(image_path)
-    img = img.resize((224, 224))
-    img_array = tf.keras.preprocessing.image.img_to_array(img)
-    img_array = np.expand_dims(img_array, axis=0)
-    return img_array / 255.0
+    # Shared decode + MobileNetV2 scaling into a (1, 224, 224, 3) float32 batch
+    return preprocessor.preprocess([image_path])
 
 def analyze_damage(image_path: str) -> Dict[str, Any]:
     """Analyzes an image for damage and returns a structured dictionary."""
+    model = get_model()
     if model is None:
         raise RuntimeError("Model is not loaded; cannot perform analysis.")
 
     processed_image = preprocess_image(image_path)
     
     prediction = model.predict(processed_image)
+    return build_analysis(prediction)
+
+def build_analysis(prediction: np.ndarray) -> Dict[str, Any]:
+    """Turns a (1, n) model prediction into the analysis dictionary."""
     # Use prediction[0][0] for clarity, assuming model output shape is (1, 1)
     damage_detected = bool(prediction[0][0] > 0.5)
     confidence = float(prediction[0][0])
@@ -48,21 +47,9 @@ def analyze_damage(image_path: str) -> Dict[str, Any]:
                 "coordinates": {"x": 120, "y": 200, "width": 80, "height": 40}
             }
         ]
-        cost_estimation = {
-            "total_cost": 850.0, "labor_cost": 400.0, "parts_cost": 300.0,
-            "paint_cost": 150.0,
-            "breakdown": [
-                {"item": "Labor", "cost": 400.0, "description": "Repair and painting labor"},
-                {"item": "Parts", "cost": 300.0, "description": "Replacement parts"},
-                {"item": "Paint", "cost": 150.0, "description": "Paint materials"}
-            ]
-        }
     else:
         damage_types = []
-        cost_estimation = {
-            "total_cost": 0.0, "labor_cost": 0.0, "parts_cost": 0.0,
-            "paint_cost": 0.0, "breakdown": []
-        }
+    cost_estimation = get_rate_table().estimate(damage_types)
     
     return {
         "damage_detected": damage_detected, "damage_types": damage_types,
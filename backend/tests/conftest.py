@@ -0,0 +1,26 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The app reads its config at import time, so point it at a throwaway
+# database and uploads directory before any test imports it
+_workdir = tempfile.mkdtemp(prefix="motoscan-tests-")
+os.environ.setdefault("DATABASE_PATH", os.path.join(_workdir, "test.db"))
+os.environ.setdefault("UPLOADS_DIR", os.path.join(_workdir, "uploads"))
+os.environ.setdefault("WARMUP_ON_STARTUP", "0")
+# No model file: the API runs in mock mode unless a test stubs the runtime
+os.environ.setdefault("MODEL_PATH", os.path.join(_workdir, "damage_detection.h5"))
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+@pytest.fixture(scope="session")
+def client():
+    """The app with startup run once; its shutdown closes executors that can't be reopened."""
+    from fastapi.testclient import TestClient
+    import main as api
+
+    with TestClient(api.app) as client:
+        yield client
@@ -0,0 +1,47 @@
+import hashlib
+import io
+
+import numpy as np
+from PIL import Image
+
+from app import config
+
+
+class StubRuntime:
+    """P(damage) from the mean pixel value, so different photos get different scores."""
+
+    def load(self):
+        return self
+
+    def predict(self, batch):
+        damage = (batch.reshape(len(batch), -1).mean(axis=1) + 1) / 2
+        return np.stack([damage, 1 - damage], axis=1).astype(np.float32)
+
+
+def jpeg(value):
+    buffer = io.BytesIO()
+    Image.fromarray(np.full((120, 160, 3), value, dtype=np.uint8)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_same_named_files_in_one_batch_are_kept_apart(client, monkeypatch):
+    from app.api.v1.endpoints import damage_detection
+
+    monkeypatch.setattr(damage_detection, "get_runtime", lambda: StubRuntime())
+    monkeypatch.setattr(config, "MODEL_VERSION", "batch-test-stub")
+    monkeypatch.setattr(config, "CASCADE_ENABLED", False)
+    monkeypatch.setattr(config, "LOCALIZATION_ENABLED", False)
+
+    payloads = [jpeg(40), jpeg(220)]
+    files = [("files", ("image.jpg", payload, "image/jpeg")) for payload in payloads]
+    response = client.post("/api/analyze/batch?user_id=batch-test", files=files)
+
+    assert response.status_code == 200, response.text
+    analyses = response.json()["analyses"]
+    paths = [analysis["image_uri"] for analysis in analyses]
+    assert len(set(paths)) == 2
+    for path, payload in zip(paths, payloads):
+        with open(path, "rb") as f:
+            assert hashlib.sha256(f.read()).digest() == hashlib.sha256(payload).digest()
+    # Each photo was scored on its own bytes
+    assert analyses[0]["confidence"] < 0.5 < analyses[1]["confidence"]
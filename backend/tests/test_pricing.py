@@ -0,0 +1,83 @@
+import logging
+
+import numpy as np
+
+from app import config
+
+# Every component distinct, so a total identifies the row it came from
+RATES = """\
+damage_type,location,severity,labor,parts,paint
+*,*,*,1,2,3
+*,*,Low,10,20,30
+*,*,Medium,100,200,300
+Scratch,*,Low,11,21,31
+Scratch,*,Medium,101,201,301
+Dent,*,High,1001,2001,3001
+"""
+
+
+def use_rates(tmp_path, monkeypatch):
+    path = tmp_path / "rates.csv"
+    path.write_text(RATES)
+    monkeypatch.setattr(config, "RATE_TABLE_PATH", str(path))
+
+
+def test_legacy_analysis_prices_from_its_severity_row(tmp_path, monkeypatch, caplog):
+    """The legacy service's Minor/Moderate severities price from the Low/Medium rows."""
+    from services.damage_detection import build_analysis
+
+    use_rates(tmp_path, monkeypatch)
+    with caplog.at_level(logging.WARNING):
+        moderate = build_analysis(np.array([[0.9, 0.1]]))
+        minor = build_analysis(np.array([[0.6, 0.4]]))
+
+    assert (moderate["severity"], moderate["cost_estimation"]["total_cost"]) == ("Moderate", 603)
+    assert (minor["severity"], minor["cost_estimation"]["total_cost"]) == ("Minor", 63)
+    assert "'*,*,*' row" not in caplog.text
+
+
+def test_endpoint_analysis_sums_separate_regions(tmp_path, monkeypatch):
+    """Regions left after NMS are separate damaged areas, and each is priced."""
+    from app.api.v1.endpoints.damage_detection import build_analysis
+
+    regions = [
+        {"x": 0, "y": 0, "width": 50, "height": 50, "location": "Upper left", "score": 0.65},
+        {"x": 400, "y": 300, "width": 80, "height": 60, "location": "Lower right", "score": 0.9},
+    ]
+    use_rates(tmp_path, monkeypatch)
+    single = build_analysis(0.65, regions[:1])
+    several = build_analysis(0.95, regions)
+
+    # Scratch/Medium, then that scratch plus a separate Dent/High
+    assert single["cost_estimation"]["total_cost"] == 603
+    assert several["cost_estimation"]["total_cost"] == 603 + 6003
+    assert len(several["damage_types"]) == 2
+
+
+def test_shipped_rates_keep_the_baseline_estimates():
+    """data/repair_rates.csv quotes the same per-photo totals as the original flat estimate."""
+    from app.api.v1.endpoints.damage_detection import build_analysis
+    from services.damage_detection import build_analysis as legacy_build_analysis
+
+    totals = {
+        confidence: build_analysis(confidence)["cost_estimation"]["total_cost"]
+        for confidence in (0.3, 0.6, 0.75, 0.9)
+    }
+    assert totals == {0.3: 0, 0.6: 800, 0.75: 800, 0.9: 1500}
+
+    legacy = {
+        confidence: legacy_build_analysis(np.array([[confidence, 1 - confidence]]))["cost_estimation"]["total_cost"]
+        for confidence in (0.3, 0.6, 0.9)
+    }
+    assert legacy == {0.3: 0, 0.6: 300, 0.9: 800}
+
+
+def test_catch_all_fallback_is_logged(tmp_path, monkeypatch, caplog):
+    from app.services.pricing import get_rate_table
+
+    use_rates(tmp_path, monkeypatch)
+    with caplog.at_level(logging.WARNING):
+        cost = get_rate_table().estimate([{"type": "Crack", "location": "Hood", "severity": "Unknown"}])
+
+    assert cost["total_cost"] == 6
+    assert "'*,*,*' row" in caplog.text
@@ -0,0 +1,31 @@
+from app import config
+from app.services import warmup
+
+
+def test_ready_without_warmup_in_mock_mode(client):
+    # conftest starts the app with WARMUP_ON_STARTUP=0 and no model file
+    assert not config.WARMUP_ON_STARTUP
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "mock"
+
+
+def test_skipped_warmup_is_ready_with_a_model(client, tmp_path, monkeypatch):
+    model_path = tmp_path / "damage_detection.h5"
+    model_path.write_bytes(b"")
+    monkeypatch.setattr(config, "MODEL_PATH", str(model_path))
+    monkeypatch.setattr(warmup, "state", warmup.WarmupState())
+
+    warmup.skip_warmup()
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "skipped"
+
+
+def test_warmup_without_a_model_is_ready_in_mock_mode(client, monkeypatch):
+    monkeypatch.setattr(warmup, "state", warmup.WarmupState())
+
+    warmup.start_background_warmup()
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "mock"
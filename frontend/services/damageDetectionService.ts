@@ -1,5 +1,16 @@
 import { DamageAnalysis, DamageType, CostEstimation } from '@/types';
 
+// The API sends cost estimations with snake_case keys
+function toCostEstimation(raw: any): CostEstimation {
+  return {
+    totalCost: raw?.total_cost ?? 0,
+    laborCost: raw?.labor_cost ?? 0,
+    partsCost: raw?.parts_cost ?? 0,
+    paintCost: raw?.paint_cost ?? 0,
+    breakdown: raw?.breakdown ?? [],
+  };
+}
+
 export class DamageDetectionService {
   private static readonly API_URL = 'http://localhost:8000/api';
   
@@ -37,13 +48,7 @@ export class DamageDetectionService {
         confidence: data.confidence,
         status: 'Completed',
         damageType: data.analysis_data.damage_types || [],
-        costEstimation: data.analysis_data.cost_estimation || {
-          totalCost: 0,
-          laborCost: 0,
-          partsCost: 0,
-          paintCost: 0,
-          breakdown: [],
-        },
+        costEstimation: toCostEstimation(data.analysis_data.cost_estimation),
       };
     } catch (error) {
       console.error('Error analyzing image:', error);
@@ -26,6 +26,7 @@ export interface DamageType {
   location: string;
   severity: 'Minor' | 'Moderate' | 'Severe';
   coordinates: { x: number; y: number; width: number; height: number };
+  confidence?: number;
 }
 
 export interface CostEstimation {
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: full-resolution decode + resize (the previous backend
+preprocessing) versus the draft-mode pipeline in image_pipeline.py.
+
+Without arguments it synthesizes a 12-megapixel phone-style JPEG.
+
+Usage:
+    python benchmark_decode.py [image.jpg ...] --repeats 20
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from image_pipeline import decode_into
+
+
+def synthetic_jpeg(path, size=(4032, 3024)):
+    """Smooth gradients plus noise, so the JPEG has realistic entropy."""
+    width, height = size
+    y, x = np.mgrid[0:height, 0:width]
+    rng = np.random.default_rng(0)
+    pixels = np.stack([x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)], axis=-1)
+    pixels = np.clip(pixels + rng.normal(0, 3, pixels.shape), 0, 255).astype(np.uint8)
+    Image.fromarray(pixels).save(path, "JPEG", quality=90)
+
+
+def full_decode(path):
+    """The previous path: full decode, resize, float64 division."""
+    img = Image.open(path).convert("RGB")
+    img = img.resize((224, 224))
+    return np.array(img) / 255.0
+
+
+def time_ms(fn, repeats):
+    fn()  # warm file cache
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare image decode paths")
+    parser.add_argument("images", nargs="*")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        images = args.images
+        if not images:
+            path = os.path.join(tmp, "phone_photo.jpg")
+            synthetic_jpeg(path)
+            images = [path]
+
+        buffer = np.empty((224, 224, 3), dtype=np.float32)
+        print(f"{'image':30} {'size':>11} {'full (ms)':>10} {'draft (ms)':>11} {'speedup':>8}")
+        for path in images:
+            with Image.open(path) as img:
+                size = f"{img.size[0]}x{img.size[1]}"
+            full_median, _ = time_ms(lambda: full_decode(path), args.repeats)
+            fast_median, _ = time_ms(lambda: decode_into(path, buffer), args.repeats)
+            print(f"{os.path.basename(path)[:30]:30} {size:>11} {full_median:10.1f} {fast_median:11.1f} "
+                  f"{full_median / fast_median:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
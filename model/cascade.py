@@ -0,0 +1,57 @@
+"""
+Two-stage cascade shared by the backend and evaluate_cascade.py.
+
+A small pre-screen model (distilled from the full classifier, see
+distill_prescreen.py) scores every photo at 96x96. Photos it is confident
+about exit early with its answer; only pre-screen P(damage) scores inside
+the uncertain band [low, high] are escalated to the full 224x224 model.
+"""
+
+import threading
+
+import numpy as np
+
+PRESCREEN_SIZE = (96, 96)
+DEFAULT_BAND = (0.3, 0.7)
+
+
+def escalation_mask(damage_scores, low=DEFAULT_BAND[0], high=DEFAULT_BAND[1]):
+    """True where the pre-screen is unsure and the full model has to decide."""
+    scores = np.asarray(damage_scores)
+    return (scores >= low) & (scores <= high)
+
+
+def combine(prescreen_scores, full_scores, escalate):
+    """Cascade P(damage): the full model's score where escalated, the pre-screen's elsewhere."""
+    return np.where(escalate, full_scores, prescreen_scores)
+
+
+class CascadeStats:
+    """How many photos left at the pre-screen versus went on to the full model."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.screened = 0
+        self.exited_damaged = 0
+        self.exited_whole = 0
+        self.escalated = 0
+
+    def record(self, damage_scores, escalate):
+        damage_scores = np.asarray(damage_scores)
+        escalate = np.asarray(escalate)
+        exited = ~escalate
+        with self._lock:
+            self.screened += len(escalate)
+            self.escalated += int(escalate.sum())
+            self.exited_damaged += int((exited & (damage_scores > 0.5)).sum())
+            self.exited_whole += int((exited & (damage_scores <= 0.5)).sum())
+
+    def as_dict(self):
+        exited = self.exited_damaged + self.exited_whole
+        return {
+            "screened": self.screened,
+            "early_exit_damaged": self.exited_damaged,
+            "early_exit_whole": self.exited_whole,
+            "escalated": self.escalated,
+            "early_exit_rate": exited / self.screened if self.screened else 0.0,
+        }
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Accuracy/latency comparison of the Keras model and its TFLite exports.
+
+Runs every backend over the data1a validation split and writes a Markdown
+report (plus the raw numbers as JSON) covering accuracy, agreement with
+the Keras predictions, probability drift and per-image latency.
+
+Usage:
+    python compare_backends.py --data data1a --report backend_comparison.md
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from dataset import CLASSES, list_images
+from image_pipeline import preprocessor
+from inference_runtime import load_runtime
+
+
+def load_validation_set(data_dir, limit=None):
+    paths = list_images(data_dir, "validation")[:limit]
+    images = preprocessor.preprocess(paths)
+    labels = np.array([CLASSES.index(os.path.basename(os.path.dirname(p))) for p in paths])
+    return images, labels
+
+
+def run_backend(runtime, images, warmup=3):
+    for i in range(min(warmup, len(images))):
+        runtime.predict(images[i:i + 1])
+
+    latencies = []
+    predictions = []
+    for i in range(len(images)):
+        start = time.perf_counter()
+        predictions.append(runtime.predict(images[i:i + 1])[0])
+        latencies.append(time.perf_counter() - start)
+    return np.array(predictions), np.array(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Keras and TFLite inference backends")
+    parser.add_argument("--data", default="data1a")
+    parser.add_argument("--keras-model", default="damage_detection.h5")
+    parser.add_argument("--tflite-models", nargs="*",
+                        default=["damage_detection_fp16.tflite", "damage_detection_int8.tflite"])
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N validation images")
+    parser.add_argument("--report", default="backend_comparison.md")
+    args = parser.parse_args()
+
+    images, labels = load_validation_set(args.data, args.limit)
+    print(f"Loaded {len(images)} validation images")
+
+    candidates = [("keras", args.keras_model)]
+    candidates += [("tflite", path) for path in args.tflite_models if os.path.exists(path)]
+
+    results = {}
+    reference = None
+    for backend, path in candidates:
+        print(f"Running {backend}: {path}")
+        predictions, latencies = run_backend(load_runtime(path, backend), images)
+        predicted = predictions.argmax(axis=1)
+        if reference is None:
+            reference = predictions
+        results[os.path.basename(path)] = {
+            "backend": backend,
+            "model_size_mb": os.path.getsize(path) / 1e6,
+            "accuracy": float((predicted == labels).mean()),
+            "agreement_with_keras": float((predicted == reference.argmax(axis=1)).mean()),
+            "max_prob_diff_vs_keras": float(np.abs(predictions - reference).max()),
+            "latency_ms_mean": float(latencies.mean()),
+            "latency_ms_p50": float(np.percentile(latencies, 50)),
+            "latency_ms_p95": float(np.percentile(latencies, 95)),
+        }
+
+    lines = [
+        "# Inference backend comparison",
+        "",
+        f"Validation images: {len(images)} (batch size 1, {os.cpu_count()} CPUs)",
+        "",
+        "| Model | Backend | Size (MB) | Accuracy | Agreement | Max prob diff | Mean ms | p50 ms | p95 ms |",
+        "|---|---|---|---|---|---|---|---|---|",
+    ]
+    for name, r in results.items():
+        lines.append(
+            f"| {name} | {r['backend']} | {r['model_size_mb']:.1f} | {r['accuracy']:.2%} | "
+            f"{r['agreement_with_keras']:.2%} | {r['max_prob_diff_vs_keras']:.4f} | "
+            f"{r['latency_ms_mean']:.1f} | {r['latency_ms_p50']:.1f} | {r['latency_ms_p95']:.1f} |"
+        )
+    report = "\n".join(lines) + "\n"
+    print(report)
+
+    with open(args.report, "w") as f:
+        f.write(report)
+    with open(os.path.splitext(args.report)[0] + ".json", "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Export damage_detection.h5 to TFLite for fast CPU inference.
+
+Writes two models next to the source model:
+- damage_detection_fp16.tflite: float16 weights, float32 compute
+- damage_detection_int8.tflite: full integer quantization, calibrated on
+  images drawn from the data1a/ training split
+
+Usage:
+    python convert_tflite.py --model damage_detection.h5 --data data1a
+"""
+
+import argparse
+import os
+import random
+
+import tensorflow as tf
+
+from dataset import list_images
+from image_pipeline import preprocessor
+from model_registry import registry
+
+
+def calibration_dataset(data_dir, num_samples=200, seed=0):
+    """Representative dataset for int8 calibration, preprocessed like the detector."""
+    paths = list_images(data_dir, "training")
+    if not paths:
+        raise FileNotFoundError(f"No calibration images found under {data_dir}/training")
+    random.Random(seed).shuffle(paths)
+
+    def generator():
+        for path in paths[:num_samples]:
+            yield [preprocessor.preprocess([path])]
+
+    return generator
+
+
+def convert_float16(model):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float16]
+    return converter.convert()
+
+
+def convert_int8(model, representative_dataset, int8_io=False):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    if int8_io:
+        # Quantized input/output too; TFLiteRuntime (de)quantizes around the call
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the damage model to TFLite")
+    parser.add_argument("--model", default="damage_detection.h5")
+    parser.add_argument("--data", default="data1a", help="dataset root with training/<class>/ folders")
+    parser.add_argument("--output-dir", default=None, help="defaults to the model's directory")
+    parser.add_argument("--calibration-samples", type=int, default=200)
+    parser.add_argument("--int8-io", action="store_true", help="also quantize model input and output")
+    parser.add_argument("--skip-int8", action="store_true")
+    args = parser.parse_args()
+
+    model = registry.get(args.model)
+    output_dir = args.output_dir or os.path.dirname(os.path.abspath(args.model))
+    stem = os.path.splitext(os.path.basename(args.model))[0]
+
+    outputs = [(f"{stem}_fp16.tflite", lambda: convert_float16(model))]
+    if not args.skip_int8:
+        dataset = calibration_dataset(args.data, args.calibration_samples)
+        outputs.append((f"{stem}_int8.tflite", lambda: convert_int8(model, dataset, args.int8_io)))
+
+    for filename, convert in outputs:
+        print(f"Converting {filename}...")
+        tflite_model = convert()
+        path = os.path.join(output_dir, filename)
+        with open(path, "wb") as f:
+            f.write(tflite_model)
+        print(f"✅ Wrote {path} ({len(tflite_model) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,53 @@
 import os
-import cv2
 import numpy as np
 import matplotlib.pyplot as plt
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.image import load_img, img_to_array
-from tensorflow.keras.applications.mobilenet_v2 import preprocess_input
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from PIL import Image, ImageTk
 import threading
 
+from dataset import CLASSES, DAMAGED_CLASS
+from inference_runtime import load_runtime
+from image_pipeline import Preprocessor
+from realtime_pipeline import RealtimePipeline
+
 class DamageDetector:
-    def __init__(self, model_path="damage_detection.h5"):
-        """Initialize the damage detector with the trained model."""
-        self.model = load_model(model_path)
-        self.classes = ["00-damage", "01-whole"]
+    def __init__(self, model_path="damage_detection.h5", backend="keras"):
+        """Initialize the damage detector with the trained model.
+
+        ``backend`` selects the inference runtime: "keras" for the H5 model
+        or "tflite" for a model exported with convert_tflite.py.
+        """
+        self.model_path = model_path
+        self.runtime = load_runtime(model_path, backend)
+        self.classes = CLASSES
         self.target_size = (224, 224)
+        self.preprocessor = Preprocessor(self.target_size)
+        
+    @property
+    def model(self):
+        """Shared model from the registry; reloaded if the file changes."""
+        return self.runtime.load()
         
     def preprocess_image(self, image_path):
         """Preprocess a single image for prediction."""
-        # Load and resize image
-        image = load_img(image_path, target_size=self.target_size)
-        # Convert to array
-        image_array = img_to_array(image)
-        # Expand dimensions for batch prediction
-        image_array = np.expand_dims(image_array, axis=0)
-        # Preprocess for MobileNetV2
-        image_array = preprocess_input(image_array)
-        return image_array
+        # Decode, resize and scale for MobileNetV2 into a reused (1, 224, 224, 3) buffer
+        return self.preprocessor.preprocess([image_path], reuse=True)
+    
+    def interpret(self, prediction):
+        """Result dict for one row of model output."""
+        predicted_class = np.argmax(prediction)
+        class_label = self.classes[predicted_class]
+        return {
+            'is_damaged': class_label == DAMAGED_CLASS,
+            'class_label': class_label,
+            'confidence': prediction[predicted_class],
+            'prediction': prediction
+        }
+    
+    def predict_batch(self, batch):
+        """Predict an already preprocessed (N, 224, 224, 3) batch in one forward pass."""
+        return [self.interpret(prediction) for prediction in self.runtime.predict(batch)]
     
     def predict_damage(self, image_path):
         """Predict whether an image shows damage or not."""
@@ -36,20 +56,8 @@ class DamageDetector:
             processed_image = self.preprocess_image(image_path)
             
             # Make prediction
-            prediction = self.model.predict(processed_image)
-            predicted_class = np.argmax(prediction[0])
-            confidence = prediction[0][predicted_class]
-            
-            # Get class label
-            class_label = self.classes[predicted_class]
-            is_damaged = class_label == "00-damage"
-            
-            return {
-                'is_damaged': is_damaged,
-                'class_label': class_label,
-                'confidence': confidence,
-                'prediction': prediction[0]
-            }
+            prediction = self.runtime.predict(processed_image)
+            return self.interpret(prediction[0])
             
         except Exception as e:
             print(f"Error predicting image: {e}")
@@ -58,29 +66,12 @@ class DamageDetector:
     def predict_from_array(self, image_array):
         """Predict from a numpy array (for webcam)."""
         try:
-            # Resize image
-            image_resized = cv2.resize(image_array, self.target_size)
-            # Convert BGR to RGB
-            image_rgb = cv2.cvtColor(image_resized, cv2.COLOR_BGR2RGB)
-            # Convert to array and preprocess
-            image_array = img_to_array(image_rgb)
-            image_array = np.expand_dims(image_array, axis=0)
-            image_array = preprocess_input(image_array)
+            # BGR frame -> resized, MobileNetV2-scaled (1, 224, 224, 3) batch
+            image_array = self.preprocessor.preprocess_frames([image_array], reuse=True)
             
             # Make prediction
-            prediction = self.model.predict(image_array)
-            predicted_class = np.argmax(prediction[0])
-            confidence = prediction[0][predicted_class]
-            
-            class_label = self.classes[predicted_class]
-            is_damaged = class_label == "00-damage"
-            
-            return {
-                'is_damaged': is_damaged,
-                'class_label': class_label,
-                'confidence': confidence,
-                'prediction': prediction[0]
-            }
+            prediction = self.runtime.predict(image_array)
+            return self.interpret(prediction[0])
             
         except Exception as e:
             print(f"Error predicting from array: {e}")
@@ -147,7 +138,7 @@ class DamageDetectorGUI:
         
         # Webcam variables
         self.webcam_active = False
-        self.cap = None
+        self.inference_every_n = 1  # raise to trade result freshness for CPU
         
     def select_file(self):
         """Open file dialog to select an image."""
@@ -214,45 +205,18 @@ class DamageDetectorGUI:
         """Stop the webcam."""
         self.webcam_active = False
         self.webcam_button.config(text="Use Webcam", bg='#2196F3')
-        if self.cap:
-            self.cap.release()
     
     def webcam_loop(self):
-        """Main webcam loop for real-time detection."""
-        self.cap = cv2.VideoCapture(0)
-        
-        if not self.cap.isOpened():
+        """Pipelined webcam loop: capture, inference and rendering run concurrently."""
+        pipeline = RealtimePipeline(self.detector.predict_from_array, source=0,
+                                    every_n=self.inference_every_n)
+        try:
+            stats = pipeline.run(display=True, keep_running=lambda: self.webcam_active)
+            print(f"Webcam session: {stats}")
+        except RuntimeError:
             messagebox.showerror("Error", "Could not open webcam")
-            self.stop_webcam()
-            return
-        
-        while self.webcam_active:
-            ret, frame = self.cap.read()
-            if not ret:
-                break
-            
-            # Make prediction
-            result = self.detector.predict_from_array(frame)
-            
-            if result:
-                # Draw results on frame
-                status = "DAMAGED" if result['is_damaged'] else "NOT DAMAGED"
-                color = (0, 0, 255) if result['is_damaged'] else (0, 255, 0)
-                confidence = result['confidence'] * 100
-                
-                cv2.putText(frame, f"{status}: {confidence:.1f}%", 
-                           (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
-            
-            # Display frame
-            cv2.imshow("Car Damage Detection - Webcam", frame)
-            
-            # Break on 'q' press
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-        
-        self.cap.release()
-        cv2.destroyAllWindows()
-        self.stop_webcam()
+        finally:
+            self.root.after(0, self.stop_webcam)
     
     def run(self):
         """Start the GUI application."""
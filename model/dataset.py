@@ -0,0 +1,33 @@
+"""
+Class names and image discovery for the data1a dataset.
+
+Every script that trains, calibrates, evaluates or scans lists its images
+through here, so they all see the same set of files.
+"""
+
+import os
+
+# Folder names under data1a/<split>/, in the model's output order
+CLASSES = ["00-damage", "01-whole"]
+DAMAGED_CLASS = CLASSES[0]
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".webp")
+
+
+def find_images(root):
+    """Every image below ``root``, sorted so runs (and resumes) see the same order."""
+    paths = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(dirpath, filename))
+    paths.sort()
+    return paths
+
+
+def list_images(data_dir, split="training"):
+    """All images under data1a/<split>/<class>/, class by class in CLASSES order."""
+    paths = []
+    for class_name in CLASSES:
+        paths += find_images(os.path.join(data_dir, split, class_name))
+    return paths
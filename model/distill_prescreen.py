@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Distill damage_detection.h5 into a tiny 96x96 pre-screen model.
+
+The student is MobileNetV2 at width 0.35 on 96x96 input with the same
+2-way softmax head as the full model. It is trained on data1a/training
+against a blend of the hard labels and the teacher's probabilities
+(softened by --temperature), so it learns where the teacher is unsure
+rather than just the labels. The result is meant for the early-exit
+cascade in cascade.py.
+
+Usage:
+    python distill_prescreen.py --teacher damage_detection.h5 --data data1a
+    python distill_prescreen.py --teacher damage_detection.h5 --data data1a --tflite
+"""
+
+import argparse
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from cascade import PRESCREEN_SIZE
+from dataset import CLASSES, find_images
+from evaluate import validation_set
+from image_pipeline import Preprocessor, decode_image, preprocessor
+from inference_runtime import load_runtime
+
+
+def training_set(data_dir):
+    """(paths, one-hot labels) for data1a/training in CLASSES order."""
+    paths, labels = [], []
+    for index, class_name in enumerate(CLASSES):
+        class_paths = find_images(os.path.join(data_dir, "training", class_name))
+        paths += class_paths
+        labels += [index] * len(class_paths)
+    if not paths:
+        raise FileNotFoundError(f"No training images found under {data_dir}/training")
+    return paths, np.eye(len(CLASSES), dtype=np.float32)[labels]
+
+
+def teacher_probabilities(teacher, paths, batch_size=32):
+    """Teacher softmax outputs on the full-resolution input it was trained on."""
+    outputs = []
+    for i in range(0, len(paths), batch_size):
+        outputs.append(teacher.predict(preprocessor.preprocess(paths[i:i + batch_size])))
+    return np.concatenate(outputs)
+
+
+def soften(probabilities, temperature):
+    logits = np.log(np.clip(probabilities, 1e-7, 1.0)) / temperature
+    logits -= logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def student_pixels(paths):
+    """uint8 96x96 images, normalized later per batch to keep the array small."""
+    width, height = PRESCREEN_SIZE
+    pixels = np.empty((len(paths), height, width, 3), dtype=np.uint8)
+    for i, path in enumerate(paths):
+        pixels[i] = np.asarray(decode_image(path, PRESCREEN_SIZE))
+    return pixels
+
+
+def build_student(alpha=0.35):
+    width, height = PRESCREEN_SIZE
+    base = tf.keras.applications.MobileNetV2(
+        input_shape=(height, width, 3), alpha=alpha, include_top=False, weights="imagenet"
+    )
+    head = tf.keras.layers.GlobalAveragePooling2D()(base.output)
+    head = tf.keras.layers.Dropout(0.2)(head)
+    head = tf.keras.layers.Dense(len(CLASSES), activation="softmax")(head)
+    return tf.keras.Model(base.input, head)
+
+
+def dataset(pixels, targets, batch_size, shuffle):
+    ds = tf.data.Dataset.from_tensor_slices((pixels, targets))
+    if shuffle:
+        ds = ds.shuffle(len(pixels), reshuffle_each_iteration=True)
+
+    def prepare(images, y):
+        images = tf.cast(images, tf.float32) / 127.5 - 1.0
+        if shuffle:
+            images = tf.image.random_flip_left_right(images)
+        return images, y
+
+    return ds.batch(batch_size).map(prepare, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the damage model into a 96x96 pre-screen model")
+    parser.add_argument("--teacher", default="damage_detection.h5")
+    parser.add_argument("--data", default="data1a")
+    parser.add_argument("--output", default="damage_prescreen.h5")
+    parser.add_argument("--epochs", type=int, default=15)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--alpha", type=float, default=0.35, help="MobileNetV2 width multiplier")
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--hard-weight", type=float, default=0.3,
+                        help="weight of the true labels versus the teacher's soft targets")
+    parser.add_argument("--tflite", action="store_true", help="also export a float16 TFLite model")
+    args = parser.parse_args()
+
+    teacher = load_runtime(args.teacher, "keras")
+    train_paths, train_labels = training_set(args.data)
+    print(f"Scoring {len(train_paths)} training images with the teacher")
+    soft = soften(teacher_probabilities(teacher, train_paths, args.batch_size), args.temperature)
+    targets = args.hard_weight * train_labels + (1 - args.hard_weight) * soft
+
+    val_paths, val_damaged = validation_set(args.data)
+    val_targets = np.stack([val_damaged, 1 - val_damaged], axis=1).astype(np.float32)
+
+    student = build_student(args.alpha)
+    student.compile(optimizer=tf.keras.optimizers.Adam(1e-3), loss="categorical_crossentropy",
+                    metrics=["accuracy"])
+    student.fit(
+        dataset(student_pixels(train_paths), targets, args.batch_size, shuffle=True),
+        validation_data=dataset(student_pixels(val_paths), val_targets, args.batch_size, shuffle=False),
+        epochs=args.epochs,
+    )
+    student.save(args.output)
+    print(f"Saved pre-screen model to {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB)")
+
+    # Same preprocessing as the serving path, as a last sanity check
+    sample = np.linspace(0, len(val_paths) - 1, min(64, len(val_paths))).astype(int)
+    check = Preprocessor(PRESCREEN_SIZE).preprocess([val_paths[i] for i in sample])
+    accuracy = (student.predict(check, verbose=0).argmax(axis=1) == val_targets[sample].argmax(axis=1)).mean()
+    print(f"Accuracy on {len(sample)} validation images through the serving preprocessor: {accuracy:.2%}")
+
+    if args.tflite:
+        from convert_tflite import convert_float16
+
+        tflite_path = os.path.splitext(args.output)[0] + "_fp16.tflite"
+        with open(tflite_path, "wb") as f:
+            f.write(convert_float16(student))
+        print(f"Saved {tflite_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Evaluation and benchmark harness over data1a/validation.
+
+For every backend/model and batch size it streams the validation split
+through a prefetching NumPy pipeline and reports:
+
+- quality: accuracy, precision/recall/F1 for the damage class, ROC-AUC and
+  the threshold on P(damage) that maximizes Youden's J
+- speed: images/sec, p50/p95/p99 per-image latency and peak RSS
+
+Run it before and after any model or runtime change so both are measured
+the same way.
+
+Usage:
+    python evaluate.py --data data1a
+    python evaluate.py --data data1a --models keras:damage_detection.h5 \\
+        tflite:damage_detection_int8.tflite --batch-sizes 1 8 32
+"""
+
+import argparse
+import json
+import os
+import queue
+import resource
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from dataset import CLASSES, DAMAGED_CLASS, find_images
+from image_pipeline import preprocessor
+from inference_runtime import load_runtime
+
+
+def validation_set(data_dir):
+    """(paths, labels) for data1a/validation, label 1 meaning damaged."""
+    paths, labels = [], []
+    for class_name in CLASSES:
+        class_paths = find_images(os.path.join(data_dir, "validation", class_name))
+        paths += class_paths
+        labels += [int(class_name == DAMAGED_CLASS)] * len(class_paths)
+    if not paths:
+        raise FileNotFoundError(f"No validation images found under {data_dir}/validation")
+    return paths, np.array(labels)
+
+
+class PrefetchLoader:
+    """Yields preprocessed batches while the next ones decode in the background.
+
+    A producer thread decodes each batch with a small thread pool (Pillow
+    releases the GIL while decoding) and keeps up to ``prefetch`` batches
+    queued, so inference timing is not mixed up with decode time.
+    """
+
+    def __init__(self, paths, batch_size, prefetch=2, workers=4):
+        self.paths = paths
+        self.batch_size = batch_size
+        self.prefetch = prefetch
+        self.workers = workers
+
+    def _produce(self, batches, stop):
+        with ThreadPoolExecutor(self.workers) as pool:
+            for i in range(0, len(self.paths), self.batch_size):
+                chunk = self.paths[i:i + self.batch_size]
+                batch = preprocessor.allocate(len(chunk))
+                list(pool.map(preprocessor.preprocess_into, chunk, batch))
+                while not stop.is_set():
+                    try:
+                        batches.put(batch, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+        batches.put(None)
+
+    def __iter__(self):
+        batches = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        producer = threading.Thread(target=self._produce, args=(batches, stop), daemon=True)
+        producer.start()
+        try:
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    return
+                yield batch
+        finally:
+            stop.set()
+            producer.join()
+
+
+class PeakMemory:
+    """Samples the process RSS in the background and keeps the peak, in MB."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def rss_mb():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+        except (OSError, ValueError):
+            # No procfs: fall back to the lifetime peak (KiB on Linux, bytes on macOS)
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak / 1e6 if peak > 1 << 32 else peak / 1e3
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, self.rss_mb())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.peak_mb = self.rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, self.rss_mb())
+
+
+def roc_auc(labels, scores):
+    """Area under the ROC curve via the rank-sum (Mann-Whitney U) statistic, ties averaged."""
+    order = np.argsort(scores, kind="mergesort")
+    sorted_scores = scores[order]
+    ranks = np.empty(len(scores))
+    ranks[order] = np.arange(1, len(scores) + 1)
+    # Average ranks within groups of tied scores
+    _, starts, counts = np.unique(sorted_scores, return_index=True, return_counts=True)
+    for start, count in zip(starts[counts > 1], counts[counts > 1]):
+        ranks[order[start:start + count]] = start + (count + 1) / 2
+    positives = labels.sum()
+    negatives = len(labels) - positives
+    if positives == 0 or negatives == 0:
+        return float("nan")
+    return float((ranks[labels == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def best_threshold(labels, scores):
+    """Threshold on the damage score maximizing TPR - FPR, evaluated at every distinct score."""
+    thresholds = np.unique(scores)
+    predicted = scores[None, :] >= thresholds[:, None]
+    tpr = (predicted & (labels == 1)).sum(axis=1) / max(labels.sum(), 1)
+    fpr = (predicted & (labels == 0)).sum(axis=1) / max((labels == 0).sum(), 1)
+    best = int(np.argmax(tpr - fpr))
+    return float(thresholds[best]), float(tpr[best] - fpr[best])
+
+
+def quality_metrics(labels, scores, threshold=0.5):
+    predicted = scores >= threshold
+    tp = int((predicted & (labels == 1)).sum())
+    fp = int((predicted & (labels == 0)).sum())
+    fn = int((~predicted & (labels == 1)).sum())
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    threshold_best, youden_j = best_threshold(labels, scores)
+    return {
+        "accuracy": float((predicted == (labels == 1)).mean()),
+        "precision": precision,
+        "recall": recall,
+        "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        "roc_auc": roc_auc(labels, scores),
+        "best_threshold": threshold_best,
+        "best_threshold_youden_j": youden_j,
+        "accuracy_at_best_threshold": float(((scores >= threshold_best) == (labels == 1)).mean()),
+    }
+
+
+def run(runtime, paths, batch_size, warmup=2, prefetch=2, workers=4):
+    """Damage scores plus per-image latencies (ms) and throughput for one configuration."""
+    warmup_batch = preprocessor.preprocess(paths[:batch_size])
+    for _ in range(warmup):
+        runtime.predict(warmup_batch)
+
+    scores = []
+    latencies = []
+    inference_time = 0.0
+    with PeakMemory() as memory:
+        started = time.perf_counter()
+        for batch in PrefetchLoader(paths, batch_size, prefetch, workers):
+            start = time.perf_counter()
+            predictions = runtime.predict(batch)
+            elapsed = time.perf_counter() - start
+            inference_time += elapsed
+            latencies += [elapsed * 1000 / len(batch)] * len(batch)
+            scores.append(predictions[:, 0])
+        wall_time = time.perf_counter() - started
+
+    latencies = np.array(latencies)
+    return np.concatenate(scores), {
+        "images": len(paths),
+        "images_per_sec": len(paths) / inference_time,
+        "images_per_sec_end_to_end": len(paths) / wall_time,
+        "latency_ms_p50": float(np.percentile(latencies, 50)),
+        "latency_ms_p95": float(np.percentile(latencies, 95)),
+        "latency_ms_p99": float(np.percentile(latencies, 99)),
+        "peak_rss_mb": memory.peak_mb,
+    }
+
+
+def write_report(results, report_path, num_images):
+    lines = [
+        "# Evaluation on data1a/validation",
+        "",
+        f"Validation images: {num_images} ({os.cpu_count()} CPUs). "
+        "Latency is per image (batch time / batch size).",
+        "",
+        "## Quality",
+        "",
+        "| Model | Accuracy | Precision | Recall | F1 | ROC-AUC | Best threshold | Accuracy @ best |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    seen = set()
+    for r in results:
+        if r["model"] in seen:
+            continue
+        seen.add(r["model"])
+        q = r["quality"]
+        lines.append(
+            f"| {r['model']} | {q['accuracy']:.2%} | {q['precision']:.2%} | {q['recall']:.2%} | "
+            f"{q['f1']:.3f} | {q['roc_auc']:.4f} | {q['best_threshold']:.3f} | "
+            f"{q['accuracy_at_best_threshold']:.2%} |"
+        )
+    lines += [
+        "",
+        "## Speed",
+        "",
+        "| Model | Batch | Images/sec | End-to-end images/sec | p50 ms | p95 ms | p99 ms | Peak RSS (MB) |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    for r in results:
+        s = r["speed"]
+        lines.append(
+            f"| {r['model']} | {r['batch_size']} | {s['images_per_sec']:.1f} | "
+            f"{s['images_per_sec_end_to_end']:.1f} | {s['latency_ms_p50']:.2f} | "
+            f"{s['latency_ms_p95']:.2f} | {s['latency_ms_p99']:.2f} | {s['peak_rss_mb']:.0f} |"
+        )
+    report = "\n".join(lines) + "\n"
+    with open(report_path, "w") as f:
+        f.write(report)
+    with open(os.path.splitext(report_path)[0] + ".json", "w") as f:
+        json.dump(results, f, indent=2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate and benchmark the damage model on data1a/validation")
+    parser.add_argument("--data", default="data1a")
+    parser.add_argument("--models", nargs="+", default=["keras:damage_detection.h5"],
+                        help="backend:path pairs, e.g. tflite:damage_detection_fp16.tflite")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--threshold", type=float, default=0.5, help="decision threshold on P(damage)")
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N images per class")
+    parser.add_argument("--prefetch", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=4, help="decode threads")
+    parser.add_argument("--report", default="evaluation.md")
+    args = parser.parse_args()
+
+    paths, labels = validation_set(args.data)
+    if args.limit:
+        keep = np.concatenate([np.flatnonzero(labels == label)[:args.limit] for label in (1, 0)])
+        paths, labels = [paths[i] for i in keep], labels[keep]
+    print(f"Loaded {len(paths)} validation images ({labels.sum()} damaged)")
+
+    results = []
+    for spec in args.models:
+        backend, _, path = spec.partition(":")
+        if not os.path.exists(path):
+            print(f"Skipping {spec}: file not found")
+            continue
+        runtime = load_runtime(path, backend)
+        for batch_size in args.batch_sizes:
+            print(f"Running {backend} {path} at batch size {batch_size}")
+            scores, speed = run(runtime, paths, batch_size, prefetch=args.prefetch, workers=args.workers)
+            results.append({
+                "model": os.path.basename(path),
+                "backend": backend,
+                "batch_size": batch_size,
+                "quality": quality_metrics(labels, scores, args.threshold),
+                "speed": speed,
+            })
+
+    print(write_report(results, args.report, len(paths)))
+    print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Accuracy cost versus saved compute of the pre-screen cascade.
+
+Scores data1a/validation once with the full model (224x224) and once with
+the pre-screen model (96x96), measures each model's per-image decode and
+inference time at batch size 1, and then replays the cascade for every
+uncertainty band. For each band it reports the early-exit share, accuracy
+and ROC-AUC next to the full model alone, agreement with the full model,
+and the expected per-image cost and speed-up.
+
+Usage:
+    python evaluate_cascade.py --data data1a --prescreen keras:damage_prescreen.h5 \\
+        --bands 0.3,0.7 0.2,0.8 0.1,0.9
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from cascade import PRESCREEN_SIZE, combine, escalation_mask
+from evaluate import quality_metrics, validation_set
+from image_pipeline import Preprocessor, preprocessor
+from inference_runtime import load_runtime
+
+
+def score(runtime, pipeline, paths, batch_size=32):
+    """P(damage) for every path, decoded at ``pipeline``'s input size."""
+    scores = []
+    for start in range(0, len(paths), batch_size):
+        batch = pipeline.preprocess(paths[start:start + batch_size], reuse=True)
+        scores.append(runtime.predict(batch)[:, 0])
+    return np.concatenate(scores)
+
+
+def per_image_ms(runtime, pipeline, paths, repeats=3):
+    """Median decode and single-image inference time in ms over ``paths``."""
+    runtime.predict(pipeline.preprocess(paths[:1]))
+    decode, infer = [], []
+    for path in paths:
+        start = time.perf_counter()
+        batch = pipeline.preprocess([path])
+        decoded = time.perf_counter()
+        for _ in range(repeats):
+            runtime.predict(batch)
+        decode.append(decoded - start)
+        infer.append((time.perf_counter() - decoded) / repeats)
+    return 1000 * float(np.median(decode)), 1000 * float(np.median(infer))
+
+
+def parse_band(text):
+    low, high = (float(value) for value in text.split(","))
+    return low, high
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the early-exit cascade on data1a/validation")
+    parser.add_argument("--data", default="data1a")
+    parser.add_argument("--full", default="keras:damage_detection.h5", help="backend:path of the full model")
+    parser.add_argument("--prescreen", default="keras:damage_prescreen.h5", help="backend:path of the pre-screen")
+    parser.add_argument("--bands", nargs="+", type=parse_band, default=[(0.3, 0.7), (0.2, 0.8), (0.1, 0.9), (0.4, 0.6)],
+                        help="low,high uncertainty bands to escalate")
+    parser.add_argument("--timing-images", type=int, default=50)
+    parser.add_argument("--report", default="cascade_evaluation.md")
+    args = parser.parse_args()
+
+    paths, labels = validation_set(args.data)
+    print(f"Loaded {len(paths)} validation images ({labels.sum()} damaged)")
+
+    full_backend, _, full_path = args.full.partition(":")
+    pre_backend, _, pre_path = args.prescreen.partition(":")
+    full = load_runtime(full_path, full_backend)
+    prescreen = load_runtime(pre_path, pre_backend)
+    pre_pipeline = Preprocessor(PRESCREEN_SIZE)
+
+    full_scores = score(full, preprocessor, paths)
+    pre_scores = score(prescreen, pre_pipeline, paths)
+
+    # Spread over both classes rather than the first (all damaged) images
+    timing_paths = [paths[i] for i in np.linspace(0, len(paths) - 1, args.timing_images).astype(int)]
+    full_decode_ms, full_infer_ms = per_image_ms(full, preprocessor, timing_paths)
+    pre_decode_ms, pre_infer_ms = per_image_ms(prescreen, pre_pipeline, timing_paths)
+    full_cost = full_decode_ms + full_infer_ms
+    pre_cost = pre_decode_ms + pre_infer_ms
+
+    results = {
+        "images": len(paths),
+        "full_model": {"path": full_path, "decode_ms": full_decode_ms, "inference_ms": full_infer_ms,
+                       **quality_metrics(labels, full_scores)},
+        "prescreen_model": {"path": pre_path, "decode_ms": pre_decode_ms, "inference_ms": pre_infer_ms,
+                            **quality_metrics(labels, pre_scores)},
+        "bands": [],
+    }
+    for low, high in args.bands:
+        escalate = escalation_mask(pre_scores, low, high)
+        cascade_scores = combine(pre_scores, full_scores, escalate)
+        escalated_share = float(escalate.mean())
+        # Escalated photos pay both stages: the 96x96 pre-screen, then the full decode + forward pass
+        cost = pre_cost + escalated_share * full_cost
+        quality = quality_metrics(labels, cascade_scores)
+        results["bands"].append({
+            "low": low,
+            "high": high,
+            "early_exit_share": 1 - escalated_share,
+            "accuracy": quality["accuracy"],
+            "accuracy_delta_vs_full": quality["accuracy"] - results["full_model"]["accuracy"],
+            "roc_auc": quality["roc_auc"],
+            "agreement_with_full": float(((cascade_scores > 0.5) == (full_scores > 0.5)).mean()),
+            "cost_ms_per_image": cost,
+            "speedup_vs_full": full_cost / cost,
+        })
+
+    lines = [
+        "# Cascade evaluation on data1a/validation",
+        "",
+        f"Images: {len(paths)}. Per-image cost is median decode + batch-1 inference: "
+        f"full {full_cost:.1f} ms ({full_decode_ms:.1f} + {full_infer_ms:.1f}), "
+        f"pre-screen {pre_cost:.1f} ms ({pre_decode_ms:.1f} + {pre_infer_ms:.1f}).",
+        "",
+        f"Full model alone: accuracy {results['full_model']['accuracy']:.2%}, "
+        f"ROC-AUC {results['full_model']['roc_auc']:.4f}. "
+        f"Pre-screen alone: accuracy {results['prescreen_model']['accuracy']:.2%}, "
+        f"ROC-AUC {results['prescreen_model']['roc_auc']:.4f}.",
+        "",
+        "| Band | Early exit | Accuracy | vs full | ROC-AUC | Agreement | ms/image | Speed-up |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    for band in results["bands"]:
+        lines.append(
+            f"| {band['low']:.2f}-{band['high']:.2f} | {band['early_exit_share']:.1%} | {band['accuracy']:.2%} | "
+            f"{band['accuracy_delta_vs_full']:+.2%} | {band['roc_auc']:.4f} | {band['agreement_with_full']:.2%} | "
+            f"{band['cost_ms_per_image']:.1f} | {band['speedup_vs_full']:.2f}x |"
+        )
+    report = "\n".join(lines) + "\n"
+    print(report)
+    with open(args.report, "w") as f:
+        f.write(report)
+    with open(os.path.splitext(args.report)[0] + ".json", "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
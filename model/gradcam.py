@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Grad-CAM heatmaps from the same forward pass as the prediction.
+
+The classifier is split at its last convolutional feature map (MobileNetV2's
+7x7x1280 ``out_relu``). The backbone runs once per batch and returns that
+map together with the prediction; only the small dense head is run under a
+GradientTape, so the gradient of P(damage) with respect to the map costs a
+few dense-layer backprops rather than a second pass through the backbone.
+The heatmaps are turned into boxes with NumPy thresholding and connected
+components, as a cheaper alternative to the tiles in localization.py.
+
+Usage:
+    python gradcam.py photo.jpg --output photo.heatmap.png
+    python gradcam.py photo.jpg --benchmark --batch-sizes 1 8
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from image_pipeline import preprocessor
+from localization import region_name
+from model_registry import registry
+
+
+def split_model(model):
+    """(backbone, head) sharing weights with ``model``, split after its last spatial feature map."""
+    import tensorflow as tf
+
+    index = max(
+        i for i, layer in enumerate(model.layers)
+        if len(layer.output.shape) == 4 and layer.output.shape[1] > 1
+    )
+    backbone = tf.keras.Model(model.inputs, model.layers[index].output)
+    features = tf.keras.Input(shape=model.layers[index].output.shape[1:])
+    x = features
+    for layer in model.layers[index + 1:]:
+        x = layer(x)
+    return backbone, tf.keras.Model(features, x)
+
+
+def grad_cam(features, gradients):
+    """(N, h, w) heatmaps in [0, 1] from feature maps and dP(damage)/d(feature map)."""
+    weights = gradients.mean(axis=(1, 2))
+    cams = np.maximum(np.einsum("nhwc,nc->nhw", features, weights), 0)
+    peak = cams.max(axis=(1, 2), keepdims=True)
+    return np.divide(cams, peak, out=np.zeros_like(cams), where=peak > 0)
+
+
+class CamRuntime:
+    """Keras runtime whose forward pass also yields a Grad-CAM heatmap per image."""
+
+    name = "keras-cam"
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self._lock = threading.Lock()
+        self._model = None
+        self._parts = None
+
+    def load(self):
+        model = registry.get(self.model_path)
+        if model is not self._model:
+            # First use, or the file was hot-reloaded by the registry
+            with self._lock:
+                if model is not self._model:
+                    self._parts = split_model(model)
+                    self._model = model
+        return model
+
+    def predict(self, batch):
+        return self.predict_with_heatmaps(batch)[0]
+
+    def predict_with_heatmaps(self, batch):
+        """(probabilities (N, 2), heatmaps (N, 7, 7)) from one pass through the backbone."""
+        import tensorflow as tf
+
+        self.load()
+        backbone, head = self._parts
+        features = backbone(np.asarray(batch, dtype=np.float32), training=False)
+        with tf.GradientTape() as tape:
+            tape.watch(features)
+            probabilities = head(features, training=False)
+            damage = probabilities[:, 0]
+        gradients = tape.gradient(damage, features)
+        return probabilities.numpy(), grad_cam(features.numpy(), gradients.numpy())
+
+
+_runtimes = {}
+_runtimes_lock = threading.Lock()
+
+
+def load_cam_runtime(model_path):
+    """Shared CamRuntime for a Keras model file."""
+    with _runtimes_lock:
+        if model_path not in _runtimes:
+            _runtimes[model_path] = CamRuntime(model_path)
+        return _runtimes[model_path]
+
+
+def upsample(heatmap, size):
+    """Bilinear resize of a float heatmap to (width, height)."""
+    return np.asarray(Image.fromarray(heatmap.astype(np.float32), mode="F").resize(size, Image.BILINEAR))
+
+
+def label_components(mask):
+    """4-connected component labels of a boolean mask (0 = background).
+
+    Every foreground pixel starts with its own label and repeatedly takes
+    the smallest label among its neighbours until nothing changes, which
+    takes at most the longest component path in whole-array steps.
+    """
+    height, width = mask.shape
+    background = height * width + 1
+    labels = np.where(mask, np.arange(1, height * width + 1).reshape(height, width), background)
+    while True:
+        padded = np.pad(labels, 1, constant_values=background)
+        smallest = np.minimum.reduce([
+            labels, padded[:-2, 1:-1], padded[2:, 1:-1], padded[1:-1, :-2], padded[1:-1, 2:],
+        ])
+        smallest = np.where(mask, smallest, background)
+        if np.array_equal(smallest, labels):
+            break
+        labels = smallest
+    # Renumber the surviving labels 1..count
+    _, dense = np.unique(labels[mask], return_inverse=True)
+    components = np.zeros((height, width), dtype=int)
+    components[mask] = dense.ravel() + 1
+    return components
+
+
+def heatmap_regions(heatmap, width, height, confidence, threshold=0.5, max_boxes=5, grid=56):
+    """Boxes around the hot areas of a heatmap, in the same format as Localizer.localize.
+
+    The heatmap covers the whole photo (the model sees it squashed to
+    224x224), so cells map back to original pixels by plain scaling. A
+    region's score is ``confidence`` times its peak heat.
+    """
+    heat = upsample(heatmap, (grid, grid))
+    labels = label_components(heat >= threshold * heat.max()) if heat.max() > 0 else np.zeros_like(heat, int)
+    count = labels.max()
+    if count == 0:
+        return []
+
+    # Bounding box and peak heat of every component at once
+    ys, xs = np.nonzero(labels)
+    ids = labels[ys, xs] - 1
+    x1 = np.full(count, grid)
+    y1 = np.full(count, grid)
+    x2 = np.zeros(count, int)
+    y2 = np.zeros(count, int)
+    peaks = np.zeros(count)
+    np.minimum.at(x1, ids, xs)
+    np.minimum.at(y1, ids, ys)
+    np.maximum.at(x2, ids, xs + 1)
+    np.maximum.at(y2, ids, ys + 1)
+    np.maximum.at(peaks, ids, heat[ys, xs])
+
+    regions = []
+    for i in np.argsort(-peaks, kind="stable")[:max_boxes]:
+        box = (x1[i] * width / grid, y1[i] * height / grid, x2[i] * width / grid, y2[i] * height / grid)
+        left, top = int(box[0]), int(box[1])
+        regions.append({
+            "x": left, "y": top,
+            "width": min(width, int(round(box[2]))) - left, "height": min(height, int(round(box[3]))) - top,
+            "score": float(confidence * peaks[i]),
+            "location": region_name(box, width, height),
+        })
+    return regions
+
+
+def colorize(heat):
+    """Black-red-yellow-white colour ramp for a [0, 1] heatmap, as uint8 RGB."""
+    ramp = np.stack([heat * 3, heat * 3 - 1, heat * 3 - 2], axis=-1)
+    return (np.clip(ramp, 0, 1) * 255).astype(np.uint8)
+
+
+def save_overlay(image, heatmap, path, max_side=512, alpha=0.45):
+    """Blend ``heatmap`` over the upright photo and save it as a compressed palette PNG."""
+    if not isinstance(image, Image.Image):
+        image = Image.open(image)
+        image.draft("RGB", (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+    image = image.convert("RGB")
+    image.thumbnail((max_side, max_side))
+    heat = colorize(upsample(heatmap, image.size))
+    blended = Image.blend(image, Image.fromarray(heat), alpha)
+    # A 256-colour palette keeps the overlay a fraction of the size of a truecolor PNG
+    blended.quantize(256).save(path, format="PNG", optimize=True)
+    return path
+
+
+def benchmark(model_path, image_path, batch_sizes=(1, 8), repeats=20):
+    """Median ms per batch for plain classification versus classification with Grad-CAM."""
+    plain = registry.get(model_path)
+    cam = load_cam_runtime(model_path)
+    results = []
+    for batch_size in batch_sizes:
+        batch = np.repeat(preprocessor.preprocess([image_path]), batch_size, axis=0)
+        timings = {
+            "predict": lambda: plain.predict(batch, verbose=0),
+            "call": lambda: plain(batch, training=False).numpy(),
+            "call+grad-cam": lambda: cam.predict_with_heatmaps(batch),
+        }
+        row = {"batch_size": batch_size}
+        for name, fn in timings.items():
+            fn()
+            samples = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                fn()
+                samples.append(time.perf_counter() - start)
+            row[name] = 1000 * float(np.median(samples))
+        row["overhead"] = row["call+grad-cam"] / row["call"] - 1
+        results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grad-CAM damage heatmaps and boxes for a photo")
+    parser.add_argument("image")
+    parser.add_argument("--model", default="damage_detection.h5")
+    parser.add_argument("--threshold", type=float, default=0.5, help="fraction of peak heat that counts as hot")
+    parser.add_argument("--output", help="save the heatmap overlay PNG here")
+    parser.add_argument("--benchmark", action="store_true", help="time Grad-CAM against plain classification")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8])
+    args = parser.parse_args()
+
+    runtime = load_cam_runtime(args.model)
+    probabilities, heatmaps = runtime.predict_with_heatmaps(preprocessor.preprocess([args.image]))
+    confidence = float(probabilities[0, 0])
+    image = ImageOps.exif_transpose(Image.open(args.image))
+    print(f"P(damage) = {confidence:.3f}")
+    for region in heatmap_regions(heatmaps[0], image.width, image.height, confidence, args.threshold):
+        print(f"  {region}")
+    if args.output:
+        save_overlay(image, heatmaps[0], args.output)
+        print(f"Saved {args.output}")
+
+    if args.benchmark:
+        print("| Batch | predict() ms | call ms | call + Grad-CAM ms | Grad-CAM overhead |")
+        print("|---|---|---|---|---|")
+        for row in benchmark(args.model, args.image, args.batch_sizes):
+            print(f"| {row['batch_size']} | {row['predict']:.1f} | {row['call']:.1f} | "
+                  f"{row['call+grad-cam']:.1f} | {row['overhead']:+.1%} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Image decoding and preprocessing shared by every detector and the backend.
+
+Phone photos are 12+ megapixels but the model only sees 224x224, so most
+of a full decode is thrown away. For JPEGs the decoder is put in draft
+mode, which lets libjpeg decode at 1/2, 1/4 or 1/8 scale (never below the
+target size). EXIF orientation and mode conversion (RGBA, grayscale,
+palette, CMYK -> RGB) happen once on the reduced image, and the pixels are
+written straight into a caller-provided float32 buffer.
+
+Normalization matches what the model was trained with: Keras
+``load_img(target_size=...)`` (nearest-neighbour resize) followed by
+MobileNetV2 ``preprocess_input``, i.e. pixels scaled to [-1, 1].
+"""
+
+import threading
+
+import numpy as np
+from PIL import Image, ImageOps
+
+TARGET_SIZE = (224, 224)
+# Bump when decoding/normalization changes so cached predictions are invalidated
+PREPROCESSING_VERSION = "mnv2-nearest-1"
+
+
+def decode_image(source, target_size=TARGET_SIZE, resample=Image.NEAREST):
+    """Open ``source`` (path or file object) as an upright RGB image of ``target_size``."""
+    image = Image.open(source)
+    # Only affects JPEGs; picks the smallest DCT scale still >= target_size
+    image.draft("RGB", target_size)
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if image.size != target_size:
+        image = image.resize(target_size, resample)
+    return image
+
+
+def decode_into(source, out, target_size=TARGET_SIZE):
+    """Decode ``source`` into ``out``, a preallocated (H, W, 3) float32 view."""
+    pixels = np.asarray(decode_image(source, target_size))
+    # Casts uint8 -> float32 in place, without a temporary float array
+    np.copyto(out, pixels, casting="unsafe")
+    return out
+
+
+def decode_batch(sources, out=None, target_size=TARGET_SIZE):
+    """Decode several images into one (N, H, W, 3) float32 batch buffer."""
+    width, height = target_size
+    if out is None:
+        out = np.empty((len(sources), height, width, 3), dtype=np.float32)
+    for i, source in enumerate(sources):
+        decode_into(source, out[i], target_size)
+    return out
+
+
+def normalize_inplace(batch):
+    """MobileNetV2 ``preprocess_input`` (x / 127.5 - 1) applied in place to a float32 array."""
+    np.divide(batch, 127.5, out=batch)
+    np.subtract(batch, 1.0, out=batch)
+    return batch
+
+
+class Preprocessor:
+    """
+    Turns image files or video frames into normalized float32 model batches.
+
+    Pixels go uint8 -> float32 directly into the output array and are
+    normalized in place, so a batch costs one allocation (or none with
+    ``reuse=True``, which hands back a view of a per-thread buffer that is
+    overwritten by that thread's next ``reuse=True`` call).
+    """
+
+    def __init__(self, target_size=TARGET_SIZE):
+        self.target_size = target_size
+        self._local = threading.local()
+
+    def allocate(self, n):
+        width, height = self.target_size
+        return np.empty((n, height, width, 3), dtype=np.float32)
+
+    def preprocess(self, sources, out=None, reuse=False):
+        """Decode and normalize image paths/file objects into an (N, H, W, 3) batch."""
+        out = self._output(len(sources), out, reuse)
+        for i, source in enumerate(sources):
+            decode_into(source, out[i], self.target_size)
+        return normalize_inplace(out)
+
+    def preprocess_into(self, source, out):
+        """Decode and normalize one image into a preallocated (H, W, 3) slot."""
+        decode_into(source, out, self.target_size)
+        return normalize_inplace(out)
+
+    def preprocess_frames(self, frames, out=None, reuse=False, bgr=True):
+        """Resize and normalize uint8 video frames (OpenCV BGR by default)."""
+        out = self._output(len(frames), out, reuse)
+        for i, frame in enumerate(frames):
+            if bgr:
+                frame = frame[..., ::-1]
+            image = Image.fromarray(np.ascontiguousarray(frame))
+            if image.size != self.target_size:
+                image = image.resize(self.target_size, Image.NEAREST)
+            np.copyto(out[i], np.asarray(image), casting="unsafe")
+        return normalize_inplace(out)
+
+    def _output(self, n, out, reuse):
+        if out is not None:
+            return out[:n]
+        if not reuse:
+            return self.allocate(n)
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or len(buffer) < n:
+            buffer = self._local.buffer = self.allocate(n)
+        return buffer[:n]
+
+
+# Shared default instance for the standard 224x224 model input
+preprocessor = Preprocessor()
@@ -0,0 +1,111 @@
+"""
+Pluggable inference runtimes.
+
+Every runtime exposes ``predict(batch) -> probabilities`` for a float32
+batch of preprocessed (N, 224, 224, 3) images, so callers can switch
+between full Keras and a converted TFLite model by configuration.
+"""
+
+import threading
+
+import numpy as np
+
+from model_registry import registry
+
+BACKENDS = ("keras", "tflite")
+
+
+class KerasRuntime:
+    """Runs the original H5 model through ``model.predict``."""
+
+    name = "keras"
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+
+    def load(self):
+        return registry.get(self.model_path)
+
+    def predict(self, batch):
+        return self.load().predict(batch, verbose=0)
+
+
+class TFLiteRuntime:
+    """
+    Runs a float16 or int8 TFLite model with the TFLite interpreter.
+
+    An interpreter holds mutable tensor state, so calls are serialized with
+    a lock; the input tensor is resized whenever the batch size changes.
+    """
+
+    name = "tflite"
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self._lock = threading.Lock()
+        self._interpreter = None
+        self._input_shape = None
+
+    def load(self):
+        # The registry may read a new file, so that happens before taking the lock
+        interpreter = registry.get(self.model_path)
+        if interpreter is not self._interpreter:
+            with self._lock:
+                self._adopt(interpreter)
+        return interpreter
+
+    def _adopt(self, interpreter):
+        """Switch to ``interpreter`` (first use or hot reload); the caller holds ``self._lock``."""
+        if interpreter is not self._interpreter:
+            self._interpreter = interpreter
+            self._input_shape = None
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        latest = registry.get(self.model_path)
+        with self._lock:
+            # Swapped only here or in load(), never while another call is using it
+            self._adopt(latest)
+            interpreter = self._interpreter
+            input_detail = interpreter.get_input_details()[0]
+            if self._input_shape != batch.shape:
+                interpreter.resize_tensor_input(input_detail["index"], batch.shape)
+                interpreter.allocate_tensors()
+                self._input_shape = batch.shape
+                input_detail = interpreter.get_input_details()[0]
+            output_detail = interpreter.get_output_details()[0]
+
+            interpreter.set_tensor(input_detail["index"], _quantize(batch, input_detail))
+            interpreter.invoke()
+            return _dequantize(interpreter.get_tensor(output_detail["index"]), output_detail)
+
+
+def _quantize(batch, detail):
+    if detail["dtype"] == np.float32:
+        return batch
+    scale, zero_point = detail["quantization"]
+    info = np.iinfo(detail["dtype"])
+    return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(detail["dtype"])
+
+
+def _dequantize(output, detail):
+    if output.dtype == np.float32:
+        return output
+    scale, zero_point = detail["quantization"]
+    return (output.astype(np.float32) - zero_point) * scale
+
+
+_runtimes = {}
+_runtimes_lock = threading.Lock()
+
+
+def load_runtime(model_path, backend="keras"):
+    """Shared runtime instance for ``model_path`` on the given backend."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+    key = (model_path, backend)
+    with _runtimes_lock:
+        if key not in _runtimes:
+            runtime_class = TFLiteRuntime if backend == "tflite" else KerasRuntime
+            _runtimes[key] = runtime_class(model_path)
+        return _runtimes[key]
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Tile-based damage localization with the whole-image classifier.
+
+The photo is decoded once at a working resolution where one tile is exactly
+the model's 224x224 input. Overlapping tiles are sliced out of it without
+any resizing, scored in a single batched forward pass, and the tiles above
+a threshold are merged into boxes with NMS.
+
+``tile_scale`` (tile side as a fraction of the shorter image side) and
+``stride`` (step between tiles as a fraction of the tile) set the number
+of tiles and therefore the accuracy/latency trade-off; see PRESETS.
+
+Usage:
+    python localization.py photo.jpg --preset balanced --output boxes.jpg
+    python localization.py photo.jpg --benchmark
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from image_pipeline import TARGET_SIZE, normalize_inplace
+
+# name -> (tile_scale, stride)
+PRESETS = {
+    "fast": (0.5, 1.0),
+    "balanced": (0.5, 0.5),
+    "accurate": (0.35, 0.5),
+}
+
+# EXIF orientations that rotate the image by 90 degrees
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def tile_origins(length, tile, step):
+    """Start offsets along one axis, evenly spread with the last tile flush with the edge."""
+    if length <= tile:
+        return np.zeros(1, dtype=int)
+    count = math.ceil((length - tile) / step) + 1
+    return np.linspace(0, length - tile, count).round().astype(int)
+
+
+def upright_size(image):
+    """(width, height) of a photo after EXIF rotation, from its header alone."""
+    if not isinstance(image, Image.Image):
+        with Image.open(image) as opened:
+            return upright_size(opened)
+    width, height = image.size
+    if image.getexif().get(0x0112, 1) in _TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def decode_working_image(source, tile_scale, tile_size=TARGET_SIZE[0]):
+    """Upright RGB pixels whose shorter side is ``tile_size / tile_scale``, plus the original (w, h)."""
+    image = Image.open(source)
+    width, height = upright_size(image)
+
+    short_side = round(tile_size / tile_scale)
+    factor = short_side / min(width, height)
+    working_size = (max(tile_size, round(width * factor)), max(tile_size, round(height * factor)))
+
+    # Draft size is in stored (pre-rotation) orientation; the larger side covers both cases
+    side = max(working_size)
+    image.draft("RGB", (side, side))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if image.size != working_size:
+        image = image.resize(working_size, Image.NEAREST)
+    return np.asarray(image), (width, height)
+
+
+def tile_batch(pixels, tile, stride):
+    """(batch of normalized tiles, tile boxes as x1, y1, x2, y2 in working pixels)."""
+    height, width = pixels.shape[:2]
+    step = max(1, round(tile * stride))
+    ys = tile_origins(height, tile, step)
+    xs = tile_origins(width, tile, step)
+
+    windows = np.lib.stride_tricks.sliding_window_view(pixels, (tile, tile, 3))
+    tiles = windows[ys[:, None], xs[None, :], 0].reshape(-1, tile, tile, 3)
+    batch = normalize_inplace(tiles.astype(np.float32))
+
+    grid_y, grid_x = np.meshgrid(ys, xs, indexing="ij")
+    x1, y1 = grid_x.ravel(), grid_y.ravel()
+    boxes = np.column_stack([x1, y1, x1 + tile, y1 + tile]).astype(np.float32)
+    return batch, boxes
+
+
+def pairwise_iou(boxes):
+    """IoU between every pair of x1, y1, x2, y2 boxes, as an (N, N) matrix."""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    inter_w = np.clip(np.minimum(x2[:, None], x2[None, :]) - np.maximum(x1[:, None], x1[None, :]), 0, None)
+    inter_h = np.clip(np.minimum(y2[:, None], y2[None, :]) - np.maximum(y1[:, None], y1[None, :]), 0, None)
+    inter = inter_w * inter_h
+    return inter / (areas[:, None] + areas[None, :] - inter)
+
+
+def coverage(box, boxes):
+    """Fraction of each of ``boxes`` that lies inside ``box``."""
+    inter_w = np.clip(np.minimum(box[2], boxes[:, 2]) - np.maximum(box[0], boxes[:, 0]), 0, None)
+    inter_h = np.clip(np.minimum(box[3], boxes[:, 3]) - np.maximum(box[1], boxes[:, 1]), 0, None)
+    return inter_w * inter_h / ((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]))
+
+
+def nms(boxes, scores, iou_threshold=0.3, merge=True):
+    """Greedy NMS over a precomputed IoU matrix.
+
+    With ``merge`` the kept box grows to the union of the boxes it
+    suppresses, so a dent spanning adjacent tiles comes out as one box, and
+    remaining boxes lying mostly inside that union are suppressed as well.
+    """
+    if len(boxes) == 0:
+        return boxes, scores
+    iou = pairwise_iou(boxes)
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    kept_boxes, kept_scores = [], []
+    for i in np.argsort(-scores, kind="stable"):
+        if suppressed[i]:
+            continue
+        cluster = ~suppressed & (iou[i] >= iou_threshold)
+        cluster[i] = True
+        suppressed |= cluster
+        if merge:
+            members = boxes[cluster]
+            box = np.concatenate([members[:, :2].min(axis=0), members[:, 2:].max(axis=0)])
+            suppressed |= coverage(box, boxes) >= 0.5
+        else:
+            box = boxes[i]
+        kept_boxes.append(box)
+        kept_scores.append(scores[i])
+    return np.array(kept_boxes), np.array(kept_scores)
+
+
+def region_name(box, width, height):
+    """Coarse position of a box in the photo, e.g. "Lower left" or "Center"."""
+    cx = (box[0] + box[2]) / 2 / width
+    cy = (box[1] + box[3]) / 2 / height
+    vertical = "Upper" if cy < 1 / 3 else "Lower" if cy > 2 / 3 else ""
+    horizontal = "left" if cx < 1 / 3 else "right" if cx > 2 / 3 else ""
+    if vertical and horizontal:
+        return f"{vertical} {horizontal}"
+    if vertical or horizontal:
+        return (vertical or horizontal.capitalize()) + (" center" if vertical else " side")
+    return "Center"
+
+
+class Localizer:
+    """Finds damaged regions by scoring overlapping tiles with a whole-image classifier.
+
+    ``predict_fn`` takes an (N, 224, 224, 3) normalized batch and returns the
+    model's (N, 2) softmax output, column 0 being P(damage). With
+    ``fallback_to_best`` a photo where no tile clears ``threshold`` still gets
+    its best-scoring tile, for callers that only localize photos the
+    whole-image model already called damaged.
+    """
+
+    def __init__(self, predict_fn, tile_scale=0.5, stride=0.5, threshold=0.6, iou_threshold=0.3,
+                 max_boxes=5, fallback_to_best=False, tile_size=TARGET_SIZE[0]):
+        self.predict_fn = predict_fn
+        self.tile_scale = tile_scale
+        self.stride = stride
+        self.threshold = threshold
+        self.iou_threshold = iou_threshold
+        self.max_boxes = max_boxes
+        self.fallback_to_best = fallback_to_best
+        self.tile_size = tile_size
+
+    @classmethod
+    def from_preset(cls, predict_fn, preset="balanced", **kwargs):
+        tile_scale, stride = PRESETS[preset]
+        return cls(predict_fn, tile_scale=tile_scale, stride=stride, **kwargs)
+
+    def localize(self, source):
+        """Damaged regions as dicts with x, y, width, height (original pixels), score and location."""
+        pixels, (width, height) = decode_working_image(source, self.tile_scale, self.tile_size)
+        batch, boxes = tile_batch(pixels, self.tile_size, self.stride)
+        scores = np.asarray(self.predict_fn(batch))[:, 0]
+
+        hot = scores >= self.threshold
+        if self.fallback_to_best and not hot.any():
+            hot[np.argmax(scores)] = True
+        boxes, scores = nms(boxes[hot], scores[hot], self.iou_threshold)
+
+        # Back from working pixels to the original photo
+        scale = width / pixels.shape[1]
+        regions = []
+        for box, score in list(zip(boxes * scale, scores))[:self.max_boxes]:
+            x1, y1 = max(0, int(box[0])), max(0, int(box[1]))
+            x2, y2 = min(width, int(round(box[2]))), min(height, int(round(box[3])))
+            regions.append({
+                "x": x1, "y": y1, "width": x2 - x1, "height": y2 - y1,
+                "score": float(score),
+                "location": region_name(box, width, height),
+            })
+        return regions
+
+    def num_tiles(self, width, height):
+        short_side = round(self.tile_size / self.tile_scale)
+        factor = short_side / min(width, height)
+        step = max(1, round(self.tile_size * self.stride))
+        columns = len(tile_origins(max(self.tile_size, round(width * factor)), self.tile_size, step))
+        rows = len(tile_origins(max(self.tile_size, round(height * factor)), self.tile_size, step))
+        return columns * rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Localize damage in a photo with tiled classification")
+    parser.add_argument("image")
+    parser.add_argument("--model", default="damage_detection.h5")
+    parser.add_argument("--backend", choices=["keras", "tflite"], default="keras")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="balanced")
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--output", help="save the photo with boxes drawn")
+    parser.add_argument("--benchmark", action="store_true", help="time every preset on the photo")
+    args = parser.parse_args()
+
+    from inference_runtime import load_runtime
+
+    runtime = load_runtime(args.model, args.backend)
+    runtime.load()
+    width, height = upright_size(args.image)
+
+    presets = sorted(PRESETS) if args.benchmark else [args.preset]
+    for preset in presets:
+        localizer = Localizer.from_preset(runtime.predict, preset, threshold=args.threshold)
+        localizer.localize(args.image)  # warm-up for this batch shape
+        start = time.perf_counter()
+        regions = localizer.localize(args.image)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{preset}: {localizer.num_tiles(width, height)} tiles, {elapsed:.0f} ms, {len(regions)} regions")
+        for region in regions:
+            print(f"  {region}")
+
+    if args.output:
+        from PIL import ImageDraw
+
+        image = ImageOps.exif_transpose(Image.open(args.image)).convert("RGB")
+        draw = ImageDraw.Draw(image)
+        for region in regions:
+            box = (region["x"], region["y"], region["x"] + region["width"], region["y"] + region["height"])
+            draw.rectangle(box, outline=(255, 0, 0), width=max(2, width // 300))
+            draw.text((box[0] + 4, box[1] + 4), f"{region['score']:.2f}", fill=(255, 0, 0))
+        image.save(args.output)
+        print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
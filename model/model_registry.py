@@ -0,0 +1,114 @@
+import logging
+import os
+import threading
+import time
+
+
+def load_keras_model(model_path):
+    """Deserialize a Keras model; TensorFlow is imported on first use."""
+    from tensorflow.keras.models import load_model
+    return load_model(model_path)
+
+
+def load_tflite_interpreter(model_path):
+    """Create a TFLite interpreter, preferring the slim tflite_runtime package."""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        from tensorflow.lite import Interpreter
+    interpreter = Interpreter(model_path=model_path, num_threads=os.cpu_count())
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+def load_model_file(model_path):
+    """Pick the loader from the file extension (.tflite or Keras H5/.keras)."""
+    if model_path.endswith(".tflite"):
+        return load_tflite_interpreter(model_path)
+    return load_keras_model(model_path)
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models.
+
+    Each model file is loaded once, lazily, on first request. Entries are
+    keyed by absolute path and checked against the file's mtime, so
+    replacing the file on disk hot-reloads it on the next lookup while
+    callers already holding the old model keep using it.
+    """
+
+    def __init__(self, loader=load_model_file):
+        self.loader = loader
+        self._models = {}      # path -> (mtime_ns, model)
+        self._failures = {}    # path -> (mtime_ns, exception)
+        self._load_times = {}  # path -> seconds spent in the last load
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_path):
+        """Return the loaded model for ``model_path``, loading it if needed."""
+        path = os.path.abspath(model_path)
+        mtime = os.stat(path).st_mtime_ns
+
+        entry = self._models.get(path)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+
+        with self._path_lock(path):
+            # Another thread may have finished the load while we waited
+            entry = self._models.get(path)
+            if entry is not None and entry[0] == mtime:
+                return entry[1]
+            failure = self._failures.get(path)
+            if failure is not None and failure[0] == mtime:
+                raise failure[1]
+
+            start = time.perf_counter()
+            try:
+                model = self.loader(path)
+            except Exception as e:
+                logging.error(f"Failed to load model from path: {path}", exc_info=True)
+                self._failures[path] = (mtime, e)
+                raise
+            self._load_times[path] = time.perf_counter() - start
+            self._failures.pop(path, None)
+            self._models[path] = (mtime, model)
+            logging.info(f"Loaded model {path} in {self._load_times[path]:.2f}s")
+            return model
+
+    def is_loaded(self, model_path):
+        path = os.path.abspath(model_path)
+        entry = self._models.get(path)
+        try:
+            return entry is not None and entry[0] == os.stat(path).st_mtime_ns
+        except OSError:
+            return False
+
+    def version(self, model_path):
+        """Version tag for the model file as it currently exists on disk."""
+        path = os.path.abspath(model_path)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return f"{stem}-{os.stat(path).st_mtime_ns}"
+
+    def load_time(self, model_path):
+        return self._load_times.get(os.path.abspath(model_path))
+
+    def evict(self, model_path):
+        path = os.path.abspath(model_path)
+        with self._path_lock(path):
+            self._models.pop(path, None)
+            self._failures.pop(path, None)
+
+    def _path_lock(self, path):
+        with self._lock:
+            return self._locks.setdefault(path, threading.Lock())
+
+
+# Shared by every detector and service in the process
+registry = ModelRegistry()
+
+
+def get_model(model_path="damage_detection.h5"):
+    """Convenience wrapper around the process-wide registry."""
+    return registry.get(model_path)
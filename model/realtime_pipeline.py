@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Pipelined real-time damage detection for webcams and video files.
+
+Capture, inference and rendering run independently so the displayed frame
+rate is no longer capped by model latency:
+
+- a capture thread keeps only the newest frame in a size-1 slot,
+- an inference thread always takes the newest frame (stale ones are skipped)
+  and can be limited to every Nth captured frame,
+- the render loop draws every new frame with the most recent result plus
+  FPS and inference latency.
+
+Usage:
+    python realtime_pipeline.py                          # webcam 0
+    python realtime_pipeline.py --source clip.mp4 --headless --every-n 3
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+class LatestFrameSlot:
+    """Holds only the most recent frame; readers track the sequence they last saw."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._closed = False
+
+    def put(self, frame):
+        with self._cond:
+            self._frame = frame
+            self._seq += 1
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def get(self, after_seq=0, timeout=None):
+        """Newest (seq, frame) newer than ``after_seq``; (after_seq, None) on timeout or close."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > after_seq or self._closed, timeout)
+            if self._seq > after_seq:
+                return self._seq, self._frame
+            return after_seq, None
+
+
+class RateMeter:
+    """Events per second over a sliding window of recent timestamps."""
+
+    def __init__(self, window=30):
+        self._stamps = deque(maxlen=window)
+
+    def tick(self):
+        self._stamps.append(time.perf_counter())
+
+    @property
+    def rate(self):
+        if len(self._stamps) < 2:
+            return 0.0
+        span = self._stamps[-1] - self._stamps[0]
+        return (len(self._stamps) - 1) / span if span > 0 else 0.0
+
+
+class RealtimePipeline:
+    def __init__(self, predict_fn, source=0, every_n=1, pace=None):
+        """``predict_fn`` takes a BGR frame and returns a result dict (or None).
+
+        ``source`` is a camera index or a video file path. Video files are
+        read as fast as possible unless ``pace`` is set, in which case
+        capture is throttled to the file's native frame rate, like a camera.
+        """
+        self.predict_fn = predict_fn
+        self.source = source
+        self.every_n = max(1, int(every_n))
+        self.pace = isinstance(source, str) if pace is None else pace
+
+        self.slot = LatestFrameSlot()
+        self._stop = threading.Event()
+        self._threads = []
+        self._cap = None
+
+        self._result_lock = threading.Lock()
+        self._result = None
+        self._result_seq = 0
+
+        self.frames_captured = 0
+        self.frames_rendered = 0
+        self.inferences = 0
+        self.latencies_ms = deque(maxlen=1000)
+        self.capture_rate = RateMeter()
+        self.render_rate = RateMeter()
+        self.inference_rate = RateMeter()
+
+    def start(self):
+        self._cap = cv2.VideoCapture(self.source)
+        if not self._cap.isOpened():
+            raise RuntimeError(f"Could not open video source {self.source!r}")
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.slot.close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    def latest_result(self):
+        """(result, seq of the frame it was computed on, latency in ms)."""
+        with self._result_lock:
+            latency = self.latencies_ms[-1] if self.latencies_ms else None
+            return self._result, self._result_seq, latency
+
+    def _capture_loop(self):
+        interval = 0.0
+        if self.pace:
+            fps = self._cap.get(cv2.CAP_PROP_FPS)
+            interval = 1.0 / fps if fps and fps > 0 else 0.0
+        next_at = time.perf_counter()
+
+        while not self._stop.is_set():
+            ret, frame = self._cap.read()
+            if not ret:
+                break
+            self.frames_captured += 1
+            self.capture_rate.tick()
+            self.slot.put(frame)
+
+            if interval:
+                next_at += interval
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        self.slot.close()
+
+    def _inference_loop(self):
+        last_seq = 0
+        while not self._stop.is_set():
+            seq, frame = self.slot.get(last_seq + self.every_n - 1, timeout=0.1)
+            if frame is None:
+                if self.slot.closed:
+                    break
+                continue
+            last_seq = seq
+
+            start = time.perf_counter()
+            result = self.predict_fn(frame)
+            latency_ms = (time.perf_counter() - start) * 1000
+
+            with self._result_lock:
+                self._result = result
+                self._result_seq = seq
+                self.latencies_ms.append(latency_ms)
+            self.inferences += 1
+            self.inference_rate.tick()
+
+    def annotate(self, frame):
+        """Draw the latest result and pipeline timings onto a copy of ``frame``."""
+        frame = frame.copy()
+        result, _, latency_ms = self.latest_result()
+
+        if result:
+            status = "DAMAGED" if result['is_damaged'] else "NOT DAMAGED"
+            color = (0, 0, 255) if result['is_damaged'] else (0, 255, 0)
+            confidence = result['confidence'] * 100
+            cv2.putText(frame, f"{status}: {confidence:.1f}%",
+                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+
+        latency_text = f"{latency_ms:.0f} ms" if latency_ms is not None else "-"
+        cv2.putText(frame, f"FPS: {self.render_rate.rate:.1f}  Inference: {latency_text}",
+                    (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+        return frame
+
+    def run(self, display=True, keep_running=None, writer=None, window="Car Damage Detection - Webcam"):
+        """Render loop; returns pipeline stats when the source ends or it is stopped.
+
+        ``keep_running`` is an optional callable polled every frame (e.g. a GUI
+        flag). With ``display=False`` nothing is shown, so it runs headless;
+        annotated frames can still be written through ``writer``.
+        """
+        self.start()
+        started = time.perf_counter()
+        last_seq = 0
+        try:
+            while keep_running is None or keep_running():
+                seq, frame = self.slot.get(last_seq, timeout=0.1)
+                if frame is None:
+                    if self.slot.closed:
+                        break
+                    continue
+                last_seq = seq
+
+                annotated = self.annotate(frame)
+                self.frames_rendered += 1
+                self.render_rate.tick()
+
+                if writer is not None:
+                    writer.write(annotated)
+                if display:
+                    cv2.imshow(window, annotated)
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        break
+        finally:
+            self.stop()
+            if display:
+                cv2.destroyAllWindows()
+        return self.stats(time.perf_counter() - started)
+
+    def stats(self, elapsed=None):
+        latencies = np.array(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        stats = {
+            "frames_captured": self.frames_captured,
+            "frames_rendered": self.frames_rendered,
+            "inferences": self.inferences,
+            "frames_skipped": self.frames_captured - self.inferences,
+            "every_n": self.every_n,
+            "inference_ms_mean": round(float(latencies.mean()), 2),
+            "inference_ms_p50": round(float(np.percentile(latencies, 50)), 2),
+            "inference_ms_p95": round(float(np.percentile(latencies, 95)), 2),
+        }
+        if elapsed:
+            stats["elapsed_s"] = round(elapsed, 3)
+            stats["capture_fps"] = round(self.frames_captured / elapsed, 2)
+            stats["render_fps"] = round(self.frames_rendered / elapsed, 2)
+            stats["inference_fps"] = round(self.inferences / elapsed, 2)
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipelined real-time damage detection")
+    parser.add_argument("--source", default="0", help="camera index or video file path")
+    parser.add_argument("--model", default="damage_detection.h5")
+    parser.add_argument("--backend", choices=["keras", "tflite"], default="keras")
+    parser.add_argument("--every-n", type=int, default=1, help="run inference on at most every Nth frame")
+    parser.add_argument("--headless", action="store_true", help="do not open a window")
+    parser.add_argument("--no-pace", action="store_true",
+                        help="read video files as fast as possible instead of at their native FPS")
+    parser.add_argument("--output", help="write the annotated video to this path")
+    args = parser.parse_args()
+
+    from damage_detector import DamageDetector
+
+    source = int(args.source) if args.source.isdigit() else args.source
+    detector = DamageDetector(args.model, backend=args.backend)
+    pipeline = RealtimePipeline(detector.predict_from_array, source, args.every_n,
+                                pace=False if args.no_pace else None)
+
+    writer = None
+    if args.output:
+        probe = cv2.VideoCapture(source)
+        fps = probe.get(cv2.CAP_PROP_FPS) or 30.0
+        size = (int(probe.get(cv2.CAP_PROP_FRAME_WIDTH)), int(probe.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        probe.release()
+        writer = cv2.VideoWriter(args.output, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+
+    try:
+        stats = pipeline.run(display=not args.headless, writer=writer)
+    finally:
+        if writer is not None:
+            writer.release()
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
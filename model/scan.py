@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Bulk damage scan of a directory tree of photos.
+
+Images are found recursively, decoded by a pool of worker processes and
+scored by DamageDetector in fixed-size batches. Results are appended to a
+CSV or JSONL file as each batch finishes, and a checkpoint written next to
+the output lets an interrupted scan pick up where it stopped.
+
+Usage:
+    python scan.py claims/ --output results.csv
+    python scan.py claims/ --output results.jsonl --batch-size 64 --workers 8
+    python scan.py claims/ --output results.csv --resume
+"""
+
+import argparse
+import bisect
+import csv
+import json
+import os
+import time
+from collections import deque
+from multiprocessing import Pool
+
+import numpy as np
+
+from dataset import find_images
+from image_pipeline import decode_image, preprocessor
+
+FIELDS = ["path", "class_label", "is_damaged", "confidence", "damage_probability", "error"]
+
+
+def decode_worker(path):
+    """Runs in a pool process: (path, uint8 pixels or None, error message)."""
+    try:
+        return path, np.asarray(decode_image(path)), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+class ResultWriter:
+    """Appends result rows to CSV or JSONL and flushes after every batch."""
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.format = "jsonl" if path.lower().endswith((".jsonl", ".ndjson")) else "csv"
+        self.file = open(path, "a" if append else "w", newline="")
+        if self.format == "csv":
+            self.writer = csv.DictWriter(self.file, fieldnames=FIELDS)
+            if self.file.tell() == 0:
+                self.writer.writeheader()
+
+    def write(self, rows):
+        for row in rows:
+            if self.format == "csv":
+                self.writer.writerow(row)
+            else:
+                self.file.write(json.dumps(row) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def checkpoint_path(output):
+    return output + ".checkpoint"
+
+
+def load_checkpoint(output, root):
+    path = checkpoint_path(output)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint["root"] != os.path.abspath(root):
+        raise SystemExit(f"{path} belongs to a scan of {checkpoint['root']}, not {root}")
+    return checkpoint
+
+
+def save_checkpoint(output, checkpoint):
+    # Written to a temp file and renamed so a crash never leaves half a checkpoint
+    path = checkpoint_path(output)
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+
+def result_row(path, result=None, error=None):
+    if result is None:
+        return {"path": path, "class_label": "", "is_damaged": "", "confidence": "",
+                "damage_probability": "", "error": error}
+    return {
+        "path": path,
+        "class_label": result["class_label"],
+        "is_damaged": bool(result["is_damaged"]),
+        "confidence": round(float(result["confidence"]), 6),
+        "damage_probability": round(float(result["prediction"][0]), 6),
+        "error": "",
+    }
+
+
+def scan(detector, root, output, batch_size=32, workers=None, prefetch=4, resume=False):
+    """Score every image under ``root``; returns (images scored, seconds)."""
+    paths = find_images(root)
+    checkpoint = load_checkpoint(output, root) if resume else None
+
+    start_index = 0
+    if checkpoint is not None:
+        # Drop anything written after the last checkpointed batch
+        with open(output, "r+") as f:
+            f.truncate(checkpoint["output_offset"])
+        start_index = bisect.bisect_right(paths, checkpoint["last_path"])
+        print(f"Resuming after {checkpoint['processed']} images ({checkpoint['last_path']})")
+    else:
+        checkpoint = {"root": os.path.abspath(root), "processed": 0, "last_path": "", "output_offset": 0}
+
+    remaining = paths[start_index:]
+    batches = [remaining[i:i + batch_size] for i in range(0, len(remaining), batch_size)]
+    print(f"{len(paths)} images found, {len(remaining)} to scan")
+
+    # One fixed-shape input buffer; a short final batch is padded, not reshaped
+    batch = preprocessor.allocate(batch_size)
+    writer = ResultWriter(output, append=start_index > 0)
+    started = time.perf_counter()
+    scanned = 0
+    try:
+        with Pool(workers) as pool:
+            # At most ``prefetch`` batches are decoding at once, which bounds memory
+            pending = deque()
+            next_batch = 0
+            while pending or next_batch < len(batches):
+                while next_batch < len(batches) and len(pending) < prefetch:
+                    pending.append(pool.map_async(decode_worker, batches[next_batch]))
+                    next_batch += 1
+
+                decoded = pending.popleft().get()
+                ok = [(path, pixels) for path, pixels, _ in decoded if pixels is not None]
+                rows = {path: result_row(path, error=error) for path, pixels, error in decoded if pixels is None}
+
+                if ok:
+                    preprocessor.preprocess_frames([pixels for _, pixels in ok], out=batch, bgr=False)
+                    results = detector.predict_batch(batch)
+                    for (path, _), result in zip(ok, results):
+                        rows[path] = result_row(path, result)
+
+                checkpoint["output_offset"] = writer.write(rows[path] for path, _, _ in decoded)
+                checkpoint["processed"] += len(decoded)
+                checkpoint["last_path"] = decoded[-1][0]
+                save_checkpoint(output, checkpoint)
+
+                scanned += len(decoded)
+                elapsed = time.perf_counter() - started
+                print(f"\r{checkpoint['processed']}/{len(paths)} images, {scanned / elapsed:.1f} images/sec",
+                      end="", flush=True)
+    finally:
+        writer.close()
+    print()
+    return scanned, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan a directory of photos for damage")
+    parser.add_argument("root", help="directory to scan recursively")
+    parser.add_argument("--output", default="scan_results.csv", help=".csv or .jsonl")
+    parser.add_argument("--model", default="damage_detection.h5")
+    parser.add_argument("--backend", choices=["keras", "tflite"], default="keras")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=None, help="decode processes (default: CPU count)")
+    parser.add_argument("--prefetch", type=int, default=4, help="batches decoded ahead of inference")
+    parser.add_argument("--resume", action="store_true", help="continue from the output's checkpoint")
+    args = parser.parse_args()
+
+    from damage_detector import DamageDetector
+
+    detector = DamageDetector(args.model, backend=args.backend)
+    scanned, elapsed = scan(detector, args.root, args.output, args.batch_size,
+                            args.workers, args.prefetch, args.resume)
+    print(f"Scanned {scanned} images in {elapsed:.1f}s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
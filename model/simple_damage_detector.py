@@ -1,17 +1,24 @@
 import os
 import numpy as np
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.image import load_img, img_to_array
-from tensorflow.keras.applications.mobilenet_v2 import preprocess_input
 import matplotlib.pyplot as plt
 
-def detect_damage(image_path, model_path="damage_detection.h5"):
+from dataset import CLASSES, DAMAGED_CLASS
+from model_registry import registry
+from inference_runtime import load_runtime
+from image_pipeline import preprocessor
+
+def preprocess_image(image_path):
+    """Load an image as a MobileNetV2-scaled (1, 224, 224, 3) float32 batch."""
+    return preprocessor.preprocess([image_path], reuse=True)
+
+def detect_damage(image_path, model_path="damage_detection.h5", backend="keras"):
     """
     Detect if a car image shows damage or not.
     
     Args:
         image_path (str): Path to the image file
         model_path (str): Path to the trained model file
+        backend (str): Inference runtime, "keras" or "tflite"
     
     Returns:
         dict: Prediction results with status, confidence, and class
@@ -27,27 +34,25 @@ def detect_damage(image_path, model_path="damage_detection.h5"):
         return None
     
     try:
-        # Load the trained model
-        print("Loading model...")
-        model = load_model(model_path)
+        # Get the trained model (loaded once per process, then reused)
+        if not registry.is_loaded(model_path):
+            print("Loading model...")
+        runtime = load_runtime(model_path, backend)
+        runtime.load()
         
         # Load and preprocess the image
         print("Processing image...")
-        image = load_img(image_path, target_size=(224, 224))
-        image_array = img_to_array(image)
-        image_array = np.expand_dims(image_array, axis=0)
-        image_array = preprocess_input(image_array)
+        image_array = preprocess_image(image_path)
         
         # Make prediction
         print("Making prediction...")
-        prediction = model.predict(image_array)
+        prediction = runtime.predict(image_array)
         predicted_class = np.argmax(prediction[0])
         confidence = prediction[0][predicted_class]
         
         # Class labels
-        classes = ["00-damage", "01-whole"]
-        class_label = classes[predicted_class]
-        is_damaged = class_label == "00-damage"
+        class_label = CLASSES[predicted_class]
+        is_damaged = class_label == DAMAGED_CLASS
         
         result = {
             'is_damaged': is_damaged,
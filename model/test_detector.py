@@ -1,4 +1,10 @@
 import os
+import sys
+import tempfile
+
+import numpy as np
+from PIL import Image
+
 from simple_damage_detector import detect_damage
 
 def test_damage_detector():
@@ -39,5 +45,174 @@ def test_damage_detector():
     
     print("\n=== Test Complete ===")
 
+def preprocess_call_sites(image_path):
+    """Model input produced by every call site that preprocesses image files."""
+    import simple_damage_detector
+    outputs = {"simple_damage_detector": simple_damage_detector.preprocess_image(image_path)[0]}
+
+    try:
+        from damage_detector import DamageDetector
+        outputs["DamageDetector.preprocess_image"] = DamageDetector().preprocess_image(image_path)[0]
+    except ImportError as e:
+        print(f"Skipping DamageDetector (missing dependency: {e.name})")
+
+    backend_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+    sys.path.insert(0, backend_dir)
+    try:
+        from services.damage_detection import preprocess_image as service_preprocess
+        from app.api.v1.endpoints.damage_detection import preprocess_into
+        outputs["backend service"] = service_preprocess(image_path)[0]
+        outputs["backend endpoint"] = preprocess_into(image_path, np.empty((224, 224, 3), dtype=np.float32))
+    except ImportError as e:
+        print(f"Skipping backend call sites (missing dependency: {e.name})")
+    finally:
+        sys.path.remove(backend_dir)
+    return outputs
+
+def training_preprocess(image_path):
+    """What the model was trained on: Keras load_img(target_size=...) + MobileNetV2 preprocess_input."""
+    from image_pipeline import TARGET_SIZE
+    try:
+        from tensorflow.keras.applications.mobilenet_v2 import preprocess_input
+        from tensorflow.keras.preprocessing.image import img_to_array, load_img
+        return preprocess_input(img_to_array(load_img(image_path, target_size=TARGET_SIZE)))
+    except ImportError:
+        # load_img is a full PIL decode and a nearest-neighbour resize; preprocess_input is x / 127.5 - 1
+        print("TensorFlow not installed; using the equivalent PIL steps as the training reference")
+        image = Image.open(image_path).convert("RGB").resize(TARGET_SIZE, Image.NEAREST)
+        return np.asarray(image, dtype=np.float32) / 127.5 - 1.0
+
+def test_preprocessing_matches_across_call_sites():
+    """Every call site must feed the model exactly what training did."""
+
+    print("=== Testing Preprocessing Consistency ===")
+
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, size=(224, 224, 3), dtype=np.uint8)
+    expected = pixels.astype(np.float32) / 127.5 - 1.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image_path = os.path.join(tmp, "sample.png")
+        Image.fromarray(pixels).save(image_path)
+
+        outputs = preprocess_call_sites(image_path)
+        try:
+            from damage_detector import DamageDetector
+            outputs["DamageDetector frames"] = DamageDetector().preprocessor.preprocess_frames([pixels[..., ::-1]])[0]
+        except ImportError:
+            pass
+
+    all_match = True
+    for name, output in outputs.items():
+        match = output.dtype == np.float32 and np.array_equal(output, expected)
+        all_match = all_match and match
+        print(f"{'✓' if match else '✗'} {name}")
+
+    assert all_match, "Preprocessing differs between call sites"
+    print("\n=== Test Complete ===")
+
+def test_preprocessing_large_jpeg_matches_training():
+    """A full-size photo goes through JPEG draft-mode decoding and resizing.
+
+    Every call site must return the identical tensor, and it must match the
+    training preprocessing to within JPEG_TOLERANCE. Draft mode lets libjpeg
+    decode at a reduced DCT scale before the nearest-neighbour resize, so it
+    can differ from a full decode by a few grey levels.
+    """
+
+    print("=== Testing Preprocessing of a Large JPEG ===")
+
+    # Mean and max absolute difference in the [-1, 1] model input (1 and 8 grey levels)
+    mean_tolerance, max_tolerance = 1 / 127.5, 8 / 127.5
+
+    # Smooth gradients, like a photo; noise would alias differently under any two resizers
+    height, width = 1200, 1600
+    y, x = np.mgrid[0:height, 0:width] / np.array([height, width])[:, None, None]
+    pixels = np.stack([255 * x, 255 * y, 127.5 * (1 + np.sin(6 * x + 4 * y))], axis=-1).astype(np.uint8)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image_path = os.path.join(tmp, "photo.jpg")
+        Image.fromarray(pixels).save(image_path, quality=90)
+        expected = training_preprocess(image_path)
+        outputs = preprocess_call_sites(image_path)
+
+    reference_name, reference = next(iter(outputs.items()))
+    all_match = True
+    for name, output in outputs.items():
+        identical = output.dtype == np.float32 and np.array_equal(output, reference)
+        error = np.abs(output - expected)
+        close = error.mean() <= mean_tolerance and error.max() <= max_tolerance
+        all_match = all_match and identical and close
+        print(f"{'✓' if identical and close else '✗'} {name}: "
+              f"{'identical to' if identical else 'differs from'} {reference_name}, "
+              f"vs training mean {error.mean():.4f} max {error.max():.4f}")
+
+    assert all_match, "Large JPEG preprocessing differs between call sites or from training"
+    print("\n=== Test Complete ===")
+
+def textured_photo(height=1200, width=1600, seed=0):
+    """Photo-like texture: noise at several scales, so resizing choices show up in the pixels."""
+    rng = np.random.default_rng(seed)
+    layers = [
+        Image.fromarray(rng.integers(0, 256, size=(height // scale, width // scale), dtype=np.uint8))
+        .resize((width, height), Image.BICUBIC)
+        for scale in (2, 8, 32)
+    ]
+    texture = np.mean([np.asarray(layer, dtype=np.float32) for layer in layers], axis=0)
+    return np.clip(np.stack([texture, texture * 0.8 + 30, 255 - texture], axis=-1), 0, 255).astype(np.uint8)
+
+def test_preprocessing_textured_jpeg_stays_close_to_training():
+    """Draft-mode decoding of textured photos must stay within a known drift of training.
+
+    Draft mode averages DCT blocks where load_img's nearest-neighbour resize
+    of the full decode picks single pixels, so on texture the two differ
+    pixel by pixel: about 10 grey levels on average for this image (white
+    noise, the worst case, is about 40). The bounds below pin that drift,
+    so a decoding change that makes it worse fails here. With a trained
+    model available, P(damage) must also agree within SCORE_TOLERANCE.
+    Real samples from data1a/validation are checked as well when present.
+    """
+
+    print("=== Testing Preprocessing of Textured Photos ===")
+
+    mean_tolerance, channel_mean_tolerance, score_tolerance = 12 / 127.5, 1 / 127.5, 0.05
+
+    from dataset import list_images
+    from image_pipeline import preprocessor
+
+    try:
+        from inference_runtime import load_runtime
+        runtime = load_runtime("damage_detection.h5")
+        runtime.load()
+    except Exception as e:
+        runtime = None
+        print(f"Skipping score comparison (no model: {e!r})")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic_path = os.path.join(tmp, "textured.jpg")
+        Image.fromarray(textured_photo()).save(synthetic_path, quality=90)
+        image_paths = [synthetic_path] + list_images("data1a", "validation")[:4]
+
+        all_close = True
+        for image_path in image_paths:
+            served = preprocessor.preprocess([image_path])[0]
+            expected = training_preprocess(image_path)
+            error = np.abs(served - expected).mean()
+            channel_error = np.abs(served.mean(axis=(0, 1)) - expected.mean(axis=(0, 1))).max()
+            close = error <= mean_tolerance and channel_error <= channel_mean_tolerance
+            line = f"{os.path.basename(image_path)}: mean error {error * 127.5:.1f} grey levels"
+            if runtime is not None:
+                scores = runtime.predict(np.stack([served, expected]))[:, 0]
+                close = close and abs(scores[0] - scores[1]) <= score_tolerance
+                line += f", P(damage) {scores[0]:.3f} served vs {scores[1]:.3f} training"
+            all_close = all_close and close
+            print(f"{'✓' if close else '✗'} {line}")
+
+    assert all_close, "Serving preprocessing drifted from training on a textured photo"
+    print("\n=== Test Complete ===")
+
 if __name__ == "__main__":
+    test_preprocessing_matches_across_call_sites()
+    test_preprocessing_large_jpeg_matches_training()
+    test_preprocessing_textured_jpeg_stays_close_to_training()
     test_damage_detector() 
\ No newline at end of file